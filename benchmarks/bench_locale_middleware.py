@@ -0,0 +1,117 @@
+"""
+Compare the throughput of LocaleMiddleware with the previous
+BaseHTTPMiddleware-based implementation on a trivial endpoint.
+
+Requests are driven in-process through the ASGI interface, without a
+server or network, so the numbers reflect the middleware overhead only:
+
+    python benchmarks/bench_locale_middleware.py --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from stufio.modules.locale.middleware import LocaleMiddleware
+from stufio.modules.locale.middleware.locale_middleware import resolve_locale
+from stufio.modules.locale.services.locale_registry import locale_registry
+
+
+class BaseHTTPLocaleMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, for reference."""
+
+    async def dispatch(self, request: Request, call_next):
+        await locale_registry.ensure_loaded()
+        request.state.locale = resolve_locale(
+            request.query_params.get("locale"),
+            request.headers.get("Accept-Language"),
+        )
+        return await call_next(request)
+
+
+async def endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(request.state.locale)
+
+
+def build_app(middleware_class) -> Starlette:
+    return Starlette(routes=[Route("/", endpoint)], middleware=[Middleware(middleware_class)])
+
+
+async def request(app: Starlette) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"accept-language", b"de-DE,de;q=0.9,en;q=0.8"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            # Nothing more to read, wait like a server would until disconnect
+            await asyncio.sleep(3600)
+        body_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def run(app: Starlette, requests: int, concurrency: int) -> float:
+    """Send the requests with the given concurrency and return requests per second."""
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await request(app)
+
+    # Warm up the registry and code paths before measuring
+    for _ in range(100):
+        await request(app)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, concurrency: int) -> None:
+    # Benchmark against a fixed set of locales instead of MongoDB
+    locale_registry._codes = frozenset({"en", "de", "fr", "es"})
+    locale_registry._loaded_at = time.monotonic()
+
+    for name, middleware_class in (
+        ("BaseHTTPMiddleware", BaseHTTPLocaleMiddleware),
+        ("ASGI LocaleMiddleware", LocaleMiddleware),
+    ):
+        rate = await run(build_app(middleware_class), requests, concurrency)
+        print(f"{name:<24} {rate:>10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -1,17 +1,20 @@
+import asyncio
 from fastapi import FastAPI
-from typing import List, Any, Tuple
+from typing import List, Any, Optional, Tuple
 
 from stufio.core.module_registry import ModuleInterface
 from .middleware import LocaleMiddleware
 from .__version__ import __version__
 from .config import LocaleSettings
 from .settings import settings_registry
+from stufio.core.config import get_settings
 
 
 class LocaleModule(ModuleInterface):
     """Locale and translation management module."""
 
     version = __version__
+    _warmup_task: Optional[asyncio.Task] = None
 
     def register_routes(self, app: FastAPI) -> None:
         """Register this module's routes with the FastAPI app."""
@@ -27,6 +30,25 @@ class LocaleModule(ModuleInterface):
         """
         return [(LocaleMiddleware, {}, {})]  # Fix: use empty list for args
 
+    async def on_startup(self, app: FastAPI) -> None:
+        """Warm up the translation cache and watch for changes in the background if enabled."""
+        if get_settings().locale_CACHE_WARMUP_ON_STARTUP:
+            from .services.warmup import warm_up_translation_cache
+            self._warmup_task = asyncio.create_task(warm_up_translation_cache())
+        if get_settings().locale_CHANGE_STREAM_ENABLED:
+            from .services.change_watcher import change_watcher
+            change_watcher.start()
+
+    async def on_shutdown(self, app: FastAPI) -> None:
+        """Stop background cache tasks."""
+        from .services.cache_service import cache_service
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        await cache_service.stop_invalidation_listener()
+        if get_settings().locale_CHANGE_STREAM_ENABLED:
+            from .services.change_watcher import change_watcher
+            await change_watcher.stop()
+
 
 # For backward compatibility
 __all__ = ["__version__", "LocaleSettings", "LocaleModule"]
@@ -4,6 +4,7 @@ from fastapi import APIRouter
 from .locales import router as locales_router
 from .translations import router as translations_router
 from .internal_translations import router as internal_translations_router
+from .internal_cache import router as internal_cache_router
 from .admin_locales import router as admin_locales_router
 from .admin_translations import router as admin_translations_router
 from stufio.api.admin import admin_router, internal_router
@@ -17,6 +18,7 @@ router.include_router(translations_router, prefix="/i18n", tags=["translations"]
 
 # Include internal routes for translations
 internal_router.include_router(internal_translations_router, prefix="/i18n", tags=["translations"])
+internal_router.include_router(internal_cache_router, prefix="/i18n", tags=["cache"])
 
 # Include admin routers
 admin_router.include_router(admin_locales_router, prefix="/i18n", tags=["locales"])
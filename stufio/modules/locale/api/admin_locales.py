@@ -4,6 +4,8 @@ from stufio.schemas import Msg
 from ..models import Locale
 from ..crud.crud_locale import crud_locale
 from ..schemas import LocaleCreate, LocaleUpdate, LocaleResponse
+from ..services.coverage import invalidate_coverage
+from ..services.locale_registry import locale_registry
 from stufio.api import deps
 
 router = APIRouter()
@@ -13,7 +15,11 @@ async def create_locale(
     locale: LocaleCreate,
     current_user: str = Depends(deps.get_current_active_superuser)
 ):
-    return await crud_locale.create(locale)
+    result = await crud_locale.create(locale)
+    # The locale list and coverage list every active locale
+    await locale_registry.invalidate()
+    await invalidate_coverage()
+    return result
 
 
 @router.get("/locales", response_model=List[LocaleResponse])
@@ -43,7 +49,10 @@ async def update_locale(
     db_obj = await crud_locale.get(locale_id=locale_id)
     if not db_obj:
         raise HTTPException(status_code=404, detail="Locale not found")
-    return await crud_locale.update(db_obj=db_obj, obj_in=locale)
+    result = await crud_locale.update(db_obj=db_obj, obj_in=locale)
+    await locale_registry.invalidate()
+    await invalidate_coverage()
+    return result
 
 
 @router.delete("/locales/{locale_id}", response_model=dict)
@@ -54,4 +63,6 @@ async def delete_locale(
     result = await crud_locale.delete(locale_id=locale_id)
     if not result:
         raise HTTPException(status_code=404, detail="Locale not found")
+    await locale_registry.invalidate()
+    await invalidate_coverage()
     return result
@@ -1,16 +1,24 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi.responses import StreamingResponse
 from stufio.schemas import Msg
+from stufio.core.config import settings
 from stufio.api import deps
 from stufio import models
-from ..crud.crud_translation import crud_translation
+from ..crud.crud_translation import TranslationImportError, crud_translation
 from ..schemas.translation import (
     TranslationCreate, 
     TranslationUpdate, 
     TranslationResponse,
     LocaleTranslationUpdate,
+    TranslationImport,
+    TranslationImportResult,
+    TranslationPage,
+    TranslationCoverage,
 )
-from ..services.cache_service import cache_translations, cache_module_translations
+from ..services.coverage import get_coverage
+from ..services.invalidation import InvalidationPlan, invalidate_translation
+from ..services.serialization import decode_cursor, encode_cursor, stream_json_array, stream_ndjson
 
 router = APIRouter()
 
@@ -42,6 +50,75 @@ async def read_translations(
         # Get all translations
         return await crud_translation.get_multi(skip=skip, limit=limit)
 
+@router.get("/translations/page", response_model=TranslationPage)
+async def read_translations_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    module: Optional[str] = None,
+    locale: Optional[str] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> TranslationPage:
+    """
+    Get translations ordered by key with optional filters, one page at a time.
+
+    Pass the returned next_cursor to get the following page; it is None on the last page.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        items, last_key = await crud_translation.get_page(
+            module_name=module, locale=locale, after=after, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(last_key) if last_key is not None else None,
+    }
+
+@router.get("/translations/coverage", response_model=List[TranslationCoverage])
+async def read_translations_coverage(
+    module: Optional[str] = None,
+    locale: Optional[str] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> List[TranslationCoverage]:
+    """
+    Get the number of translated, missing and overridden keys per locale and module.
+    """
+    coverage = await get_coverage([module] if module else None)
+    return [
+        row
+        for rows in coverage.values()
+        for row in rows
+        if locale is None or row["locale"] == locale
+    ]
+
+@router.get("/translations/export")
+async def export_translations(
+    module: Optional[str] = None,
+    locale: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "ndjson",
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> StreamingResponse:
+    """
+    Export the full translation catalog, optionally filtered by module and locale.
+
+    Documents are read in cursor batches and streamed, so memory use does
+    not grow with the size of the catalog.
+    """
+    try:
+        documents = crud_translation.iter_documents(
+            module_name=module,
+            locale=locale,
+            batch_size=settings.locale_STREAM_BATCH_SIZE,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(stream_ndjson(documents), media_type="application/x-ndjson")
+    return StreamingResponse(stream_json_array(documents), media_type="application/json")
+
 @router.post("/translations", response_model=TranslationResponse)
 async def create_translation(
     translation_in: TranslationCreate,
@@ -63,14 +140,52 @@ async def create_translation(
     result = await crud_translation.create(obj_in=translation_in)
     
     # Invalidate cache for affected locales and modules
-    if translation_in.translations:
-        for locale in translation_in.translations.keys():
-            await cache_translations(locale)
-            for module in translation_in.modules:
-                await cache_module_translations(locale, module)
+    await invalidate_translation(
+        translation_in.translations.keys(),
+        translation_in.modules,
+        membership_changed=True,
+        key=translation_in.key,
+    )
     
     return result
 
+@router.post("/translations/import", response_model=TranslationImportResult)
+async def import_translations(
+    import_in: TranslationImport,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> TranslationImportResult:
+    """
+    Create or update many translations at once.
+
+    Given locales and module overrides are set and modules are added on
+    existing keys; other locales are left untouched.
+    """
+    if any(not item.modules for item in import_in.items):
+        raise HTTPException(status_code=400, detail="At least one module must be specified for every key")
+
+    # Invalidate cache for all affected locales and modules at once, also
+    # when the import fails partway and earlier batches were written
+    plan = InvalidationPlan()
+    for item in import_in.items:
+        plan.add_translation(item.translations.keys(), item.modules, membership_changed=True, key=item.key)
+
+    try:
+        result = await crud_translation.bulk_upsert(
+            import_in.items, batch_size=settings.locale_STREAM_BATCH_SIZE
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TranslationImportError as e:
+        raise HTTPException(status_code=409, detail={
+            "message": str(e),
+            **e.counts,
+            "errors": e.errors,
+        })
+    finally:
+        await plan.flush_write()
+
+    return result
+
 @router.get("/translations/{id}", response_model=TranslationResponse)
 async def read_translation_by_id(
     id: str,
@@ -115,17 +230,20 @@ async def update_translation(
     if translation_in.modules is not None and len(translation_in.modules) == 0:
         raise HTTPException(status_code=400, detail="At least one module must be specified")
     
+    previous_modules = set(translation.modules)
+
     # Update the translation
     result = await crud_translation.update(db_obj=translation, obj_in=translation_in)
     
-    # Invalidate cache for affected locales and modules
-    if translation_in.translations:
-        for locale in translation_in.translations.keys():
-            await cache_translations(locale)
-            # Invalidate all modules this translation might apply to
-            modules = translation_in.modules or translation.modules
-            for module in modules:
-                await cache_module_translations(locale, module)
+    # Invalidate cache for affected locales and for modules the key moved in or out of
+    moved_modules = set(translation_in.modules or previous_modules) ^ previous_modules
+    plan = InvalidationPlan().add_translation(
+        (translation_in.translations or {}).keys(),
+        previous_modules | moved_modules,
+        key=translation.key,
+    )
+    plan.add_translation([], moved_modules, membership_changed=True)
+    await plan.flush_write()
     
     return result
 
@@ -141,14 +259,17 @@ async def delete_translation(
     if not translation:
         raise HTTPException(status_code=404, detail="Translation not found")
     
-    # Invalidate cache for affected locales and modules
-    for locale in translation.translations.keys():
-        await cache_translations(locale)
-        for module in translation.modules:
-            await cache_module_translations(locale, module)
-        
     # Delete the translation
     result = await crud_translation.delete(id=id)
+
+    # Invalidate cache for affected locales and modules
+    await invalidate_translation(
+        translation.translations.keys(),
+        translation.modules,
+        membership_changed=True,
+        key=translation.key,
+    )
+
     return {"success": result}
 
 @router.post("/translations/locale", response_model=TranslationResponse)
@@ -164,19 +285,27 @@ async def upsert_translation_locale(
     """
     Create or update a single locale for a translation.
     """
-    result = await crud_translation.upsert_translation(
-        key=key,
-        modules=modules,
-        locale=locale,
-        text=text,
-        description=description,
-        module_override=module_overrides,
-    )
+    previous = await crud_translation.get_by_key(key=key)
+    try:
+        result = await crud_translation.upsert_translation(
+            key=key,
+            modules=modules,
+            locale=locale,
+            text=text,
+            description=description,
+            module_override=module_overrides,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Invalidate cache
-    await cache_translations(locale)
-    for module in modules:
-        await cache_module_translations(locale, module)
+    # Invalidate cache, and the maps of the key's modules in every locale if
+    # it was created (or recreated meanwhile) or added to modules
+    membership_changed = (
+        previous is None
+        or previous.created_at != result.created_at
+        or not set(modules) <= set(previous.modules)
+    )
+    await invalidate_translation([locale], modules, membership_changed=membership_changed, key=key)
         
     return result
 
@@ -189,17 +318,17 @@ async def delete_locale_translation(
     """
     Remove a specific locale from a translation.
     """
-    translation = await crud_translation.get_by_key(key=key)
-    if not translation:
-        raise HTTPException(status_code=404, detail="Translation not found")
-        
-    result = await crud_translation.delete_locale_translation(key=key, locale=locale)
-    if not result:
+    try:
+        modules = await crud_translation.delete_locale_translation(key=key, locale=locale)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if modules is None:
+        if not await crud_translation.get_by_key(key=key):
+            raise HTTPException(status_code=404, detail="Translation not found")
         raise HTTPException(status_code=404, detail="Locale not found in translation")
     
     # Invalidate cache
-    await cache_translations(locale)
-    for module in translation.modules:
-        await cache_module_translations(locale, module)
+    await invalidate_translation([locale], modules, key=key)
         
     return {"deleted": True}
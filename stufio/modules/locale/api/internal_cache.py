@@ -0,0 +1,69 @@
+import time
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Body, HTTPException
+from fastapi.responses import PlainTextResponse
+from ..crud.crud_bundle import crud_bundle
+from ..crud.crud_locale import crud_locale
+from ..crud.crud_translation import crud_translation
+from ..schemas.cache import BundleRebuild, BundleRebuildResult, CacheWarmupResult
+from ..services.cache_service import cache_service
+from ..services.invalidation import InvalidationPlan
+from ..services.metrics import metrics
+from ..services.warmup import warm_up_translation_cache
+
+
+router = APIRouter()
+
+
+@router.post("/cache/warmup", response_model=CacheWarmupResult)
+async def warmup_cache(
+    concurrency: Optional[int] = Body(None),
+    force: bool = Body(False),
+) -> CacheWarmupResult:
+    """
+    Prebuild cached translation maps for all active locales and modules.
+    """
+    return await warm_up_translation_cache(concurrency=concurrency, force=force)
+
+
+@router.post("/cache/bundles/rebuild", response_model=BundleRebuildResult)
+async def rebuild_bundles(rebuild_in: BundleRebuild) -> BundleRebuildResult:
+    """
+    Recompile the stored translation bundles from the translations and
+    invalidate the cached maps built from them.
+    """
+    started = time.monotonic()
+    locales = rebuild_in.locales or [locale.code for locale in await crud_locale.get_active(limit=1000)]
+    modules = rebuild_in.modules or await crud_translation.get_modules()
+    pairs = [(locale, module) for module in modules for locale in locales]
+
+    try:
+        stored = await crud_bundle.rebuild(pairs=pairs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    plan = InvalidationPlan()
+    for locale, module in pairs:
+        plan.add_module(module, locale=locale)
+    await plan.flush()
+
+    return {"bundles": stored, "duration": round(time.monotonic() - started, 3)}
+
+
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def read_cache_stats() -> Dict[str, Any]:
+    """
+    Get translation cache counters, latency histograms and in-process cache stats.
+    """
+    return {
+        "local_cache": cache_service.get_local_stats(),
+        "metrics": metrics.snapshot(),
+    }
+
+
+@router.get("/cache/metrics", response_class=PlainTextResponse)
+async def read_cache_metrics() -> str:
+    """
+    Get translation cache metrics in the Prometheus text exposition format.
+    """
+    return metrics.render_prometheus()
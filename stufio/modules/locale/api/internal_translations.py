@@ -6,7 +6,7 @@ from ..schemas.translation import (
     TranslationResponse,
 )
 from ..crud.crud_translation import crud_translation
-from ..services.cache_service import cache_translations, cache_module_translations
+from ..services.invalidation import InvalidationPlan, invalidate_translation
 from stufio.api import deps
 
 
@@ -46,6 +46,9 @@ async def create_translation(
         if new_modules:
             existing.modules.extend(new_modules)
             result = await crud_translation.update(db_obj=existing, obj_in={"modules": existing.modules})
+
+            # The key now shows up in the maps of the new modules
+            await invalidate_translation([], new_modules, membership_changed=True, key=existing.key)
         else:
             raise HTTPException(status_code=400, detail=f"Translation with key '{translation_in.key}' already exists for all specified modules")
     else:
@@ -53,11 +56,12 @@ async def create_translation(
         result = await crud_translation.create(translation_in)
 
         # Invalidate cache for all affected locales and modules
-        if translation_in.translations:
-            for locale in translation_in.translations.keys():
-                await cache_translations(locale)
-                for module in translation_in.modules:
-                    await cache_module_translations(locale, module)
+        await invalidate_translation(
+            translation_in.translations.keys(),
+            translation_in.modules,
+            membership_changed=True,
+            key=translation_in.key,
+        )
 
     return result
 
@@ -80,16 +84,17 @@ async def update_translation(
         raise HTTPException(status_code=400, detail="At least one module must be specified")
     
     
+    previous_modules = set(translation.modules)
+
     # Update the translation
     result = await crud_translation.update(db_obj=translation, obj_in=update_in)
     
-    # Invalidate cache for affected locales
-    if update_in.translations:
-        for locale in update_in.translations.keys():
-            await cache_translations(locale)
-            # Invalidate all modules this translation might apply to
-            modules = update_in.modules or translation.modules
-            for module in modules:
-                await cache_module_translations(locale, module)
+    # Invalidate cache for affected locales and for modules the key moved in or out of
+    moved_modules = set(update_in.modules or previous_modules) ^ previous_modules
+    plan = InvalidationPlan().add_translation(
+        (update_in.translations or {}).keys(), previous_modules | moved_modules, key=key
+    )
+    plan.add_translation([], moved_modules, membership_changed=True)
+    await plan.flush_write()
     
     return result
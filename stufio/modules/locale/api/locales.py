@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from typing import List, Optional
 from ..schemas.locale import LocaleResponse
-from ..models.locale import Locale
 from ..crud.crud_locale import crud_locale
+from ..services.locale_registry import locale_registry
+from ..services.serialization import etag_matches
 from stufio.api import deps
 
 router = APIRouter()
 
 
 @router.get("/locales", response_model=List[LocaleResponse])
-async def list_locales():
-    return await crud_locale.get_multi(
-        filter_expression=Locale.active == True, skip=0, limit=None
-    )
+async def list_locales(if_none_match: Optional[str] = Header(None)) -> Response:
+    """
+    List the active locales, served from the in-memory locale registry.
+
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+    """
+    body, etag = await locale_registry.get_body()
+    headers = {"ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/locales/{locale_id}", response_model=LocaleResponse)
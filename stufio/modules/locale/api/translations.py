@@ -1,15 +1,46 @@
-from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from ..schemas.translation import TranslationResponse
+from typing import Dict, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Header, Response
+from fastapi.responses import StreamingResponse
+from stufio.core.config import settings
+from ..crud.crud_bundle import crud_bundle
 from ..crud.crud_translation import crud_translation
 from ..services.cache_service import cache_service
+from ..services.locale_registry import locale_registry
+from ..services.metrics import request_seconds
+from ..services.serialization import content_etag, dumps, etag_matches, stream_json_object, stream_ndjson
 from stufio.api import deps
-from stufio.db.redis import RedisClient
-
-import json
 
 router = APIRouter()
 
+# Maximum number of keys resolved by one bulk text lookup
+MAX_BULK_KEYS = 1000
+
+# Maximum number of locale+module maps returned by one bundle request
+MAX_BUNDLES = 250
+
+
+async def _resolve_locales(*locales: str) -> List[str]:
+    """
+    Map requested locales to the active locales serving them, rejecting the
+    others before they reach the cache or database.
+
+    A code that is not active itself is served by the first active locale of
+    its fallback chain, e.g. "de-AT" by "de".
+    """
+    try:
+        await locale_registry.ensure_loaded()
+    except Exception:
+        # Locales were never loaded, serve what the cache or database has
+        return list(locales)
+
+    resolved = []
+    for locale in locales:
+        active = locale_registry.resolve(locale)
+        if active is None:
+            raise HTTPException(status_code=404, detail=f"Locale '{locale}' not found")
+        resolved.append(active)
+    return resolved
+
 
 @router.get("/translations/locale/{locale}", response_model=Dict[str, str])
 async def read_translations_by_locale(
@@ -17,33 +48,112 @@ async def read_translations_by_locale(
     module: str,
     skip: Optional[int] = 0,
     limit: Optional[int] = None,
-) -> List[TranslationResponse]:
+    stream: Optional[Literal["json", "ndjson"]] = None,
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
     """
     Retrieve all translations for a specific locale.
+
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+    Pages requested with `skip` or `limit` are read from the database.
+    With `stream`, the map is read from the database in cursor batches and
+    streamed as one JSON object or as NDJSON lines, bypassing the cache.
     """
+    locale = (await _resolve_locales(locale))[0]
+
+    if stream:
+        try:
+            pairs = crud_translation.iter_translations_map(
+                locale=locale,
+                module_name=module,
+                skip=skip,
+                limit=limit,
+                batch_size=settings.locale_STREAM_BATCH_SIZE,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _stream_response(pairs, stream)
     
-    # Check cache first
-    cache_key = f"translations_map:{locale}:{module}"
-    redis = await RedisClient()
-    cached = await redis.get(cache_key)
+    with request_seconds.time(endpoint="translations_map"):
+        try:
+            if skip or limit:
+                # Pages are not cached, the cache only holds complete maps
+                body = dumps(await crud_translation.get_translations_map(
+                    locale=locale, module_name=module, skip=skip, limit=limit
+                ))
+                etag = content_etag(body)
+            else:
+                # Serve from cache, rebuilding from the bundle once on a miss
+                entry = await cache_service.get_or_build_translations_map(
+                    locale, module, lambda: crud_bundle.get_map(locale, module)
+                )
+                body, etag = entry.body, entry.etag
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # The body is already encoded JSON, skip response model validation
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post("/translations/bundles", response_model=Dict[str, Dict[str, Dict[str, str]]])
+async def read_translation_bundles(
+    locales: List[str] = Body(...),
+    modules: List[str] = Body(...),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """
+    Retrieve the translation maps of several locales and modules at once,
+    keyed by locale and then by module.
+
+    Cached maps are read in one Redis round-trip and all missing ones are
+    built from a single database query.
+    """
+    locales = list(dict.fromkeys(locales))
+    modules = list(dict.fromkeys(modules))
+    if not locales or not modules:
+        raise HTTPException(status_code=400, detail="At least one locale and one module must be specified")
+    if len(locales) * len(modules) > MAX_BUNDLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BUNDLES} locale and module combinations can be requested at once")
 
-    if cached:
+    # Several requested locales may be served by the same active locale
+    resolved = dict(zip(locales, await _resolve_locales(*locales)))
+    active_locales = list(dict.fromkeys(resolved.values()))
+
+    with request_seconds.time(endpoint="translations_bundles"):
         try:
-            return json.loads(cached)
-        except:
-            # If cache parse fails, continue to get from DB
-            pass
+            served = await cache_service.get_or_build_translations_maps(
+                [(locale, module) for locale in active_locales for module in modules],
+                crud_bundle.get_maps,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    entries = {(locale, module): served[(resolved[locale], module)] for locale in locales for module in modules}
+
+    etag = content_etag("".join(entries[(locale, module)].etag for locale in locales for module in modules))
+    headers = {"ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Compose the response from the cached bodies without decoding them
+    body = "{" + ",".join(
+        dumps(locale) + ":{" + ",".join(
+            f"{dumps(module)}:{entries[(locale, module)].body}" for module in modules
+        ) + "}"
+        for locale in locales
+    ) + "}"
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    # Get translations map from database
-    result = await crud_translation.get_translations_map(
-        locale=locale, module_name=module, skip=skip, limit=limit
-    )
 
-    # Cache for 5 minutes
-    if result:
-        await redis.set(cache_key, json.dumps(result), ex=300)
-        
-    return result
+def _stream_response(pairs, stream_format: str) -> StreamingResponse:
+    """Stream (key, text) pairs as a JSON object or as NDJSON lines."""
+    if stream_format == "ndjson":
+        lines = ({"key": key, "text": text} async for key, text in pairs)
+        return StreamingResponse(stream_ndjson(lines), media_type="application/x-ndjson")
+    return StreamingResponse(stream_json_object(pairs), media_type="application/json")
 
 
 @router.post("/translations/text", response_model=Dict[str, str])
@@ -55,21 +165,57 @@ async def get_translation_text(
     """
     Get just the text for a specific translation, locale, and optional module.
     """
-    # Try to get from cache first
-    cached = await cache_service.get_translation(locale, key, module)
-    
-    if cached:
-        return {"text": cached}
-    
-    # Get from database with possible module override
-    text = await crud_translation.get_translation(
-        key=key, locale=locale, module_name=module
-    )
+    locale = (await _resolve_locales(locale))[0]
+
+    with request_seconds.time(endpoint="translation_text"):
+        # Try to get from cache first, fetching from the database once on a miss
+        try:
+            text = await cache_service.get_or_build_translation(
+                locale,
+                key,
+                module,
+                # Get from database with possible module override
+                lambda: crud_translation.get_translation(
+                    key=key, locale=locale, module_name=module
+                ),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
     if text is None:
         raise HTTPException(status_code=404, detail="Translation not found")
     
-    # Cache the result
-    await cache_service.set_translation(locale, key, text, module)
-    
     return {"text": text}
+
+
+@router.post("/translations/texts", response_model=Dict[str, str])
+async def get_translation_texts(
+    keys: List[str] = Body(...),
+    locale: str = Body(...),
+    module: Optional[str] = Body(None),
+) -> Dict[str, str]:
+    """
+    Get the texts of many translation keys for a locale and optional module.
+
+    Keys that do not exist are left out of the result.
+    """
+    if len(keys) > MAX_BULK_KEYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_KEYS} keys can be requested at once")
+    locale = (await _resolve_locales(locale))[0]
+
+    with request_seconds.time(endpoint="translation_texts"):
+        keys = list(dict.fromkeys(keys))
+        # Resolve the uncached keys with one database query and cache the results
+        try:
+            found = await cache_service.get_or_build_translations(
+                locale,
+                keys,
+                module,
+                lambda pending: crud_translation.get_translations_texts(
+                    keys=pending, locale=locale, module_name=module
+                ),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return {key: found[key] for key in keys if key in found}
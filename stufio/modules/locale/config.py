@@ -11,6 +11,53 @@ class LocaleSettings(ModuleSettings, BaseModel):
     FALLBACK_LOCALE: str = "en"
     USE_FALLBACK: bool = True
 
+    # Documents fetched per MongoDB cursor batch when streaming catalogs,
+    # and operations sent per bulk write when importing them
+    STREAM_BATCH_SIZE: int = 1000
+
+    # In-process (L1) translation cache in front of Redis
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_MAX_SIZE: int = 10000
+    CACHE_L1_TTL: int = 60
+
+    # Translation maps are served as is up to the soft TTL, served while being
+    # refreshed in the background up to the hard TTL, then rebuilt on request
+    CACHE_MAP_SOFT_TTL: int = 300
+    CACHE_MAP_HARD_TTL: int = 3600
+
+    # Seconds to remember that a requested translation key does not exist
+    CACHE_NEGATIVE_TTL: int = 30
+
+    # Seconds the in-memory list of active locales is used before reloading it,
+    # in case a change notification was missed
+    LOCALE_REGISTRY_TTL: int = 300
+
+    # Prebuild translation maps of all active locales and modules on startup
+    CACHE_WARMUP_ON_STARTUP: bool = False
+    CACHE_WARMUP_CONCURRENCY: int = 4
+
+    # Cluster-wide lock so only one worker rebuilds an expired translation map
+    CACHE_REBUILD_LOCK_ENABLED: bool = False
+    CACHE_REBUILD_LOCK_TTL: int = 10
+    CACHE_REBUILD_LOCK_WAIT: float = 2.0
+
+    # Rebuild cached maps from compiled per locale+module bundles kept up to
+    # date on write; bundles older than the max age are recompiled. Without
+    # the change stream watcher, writes made outside the API only reach the
+    # bundles by recompiling, so the max age is capped at CACHE_MAP_SOFT_TTL.
+    BUNDLES_ENABLED: bool = True
+    BUNDLE_MAX_AGE: int = 86400
+
+    # Invalidate caches from MongoDB change streams (replica set required), so
+    # writes made outside the API are picked up and map TTLs can be raised.
+    # API writes are then invalidated by the watcher only, once their change
+    # event is consumed, rather than also by the request itself.
+    # Pre-images (MongoDB 6.0+, changeStreamPreAndPostImages enabled on the
+    # collections) narrow down deletes and module changes.
+    CHANGE_STREAM_ENABLED: bool = False
+    CHANGE_STREAM_PRE_IMAGES: bool = False
+    CHANGE_STREAM_LEASE_TTL: int = 30
+
 
 # Register these settings with the core
 settings.register_module_settings("locale", LocaleSettings)
@@ -1,4 +1,5 @@
+from .crud_bundle import crud_bundle
 from .crud_locale import crud_locale
 from .crud_translation import crud_translation
 
-__all__ = ["crud_locale", "crud_translation"]
\ No newline at end of file
+__all__ = ["crud_bundle", "crud_locale", "crud_translation"]
\ No newline at end of file
@@ -0,0 +1,385 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from stufio.core.config import settings
+from stufio.crud.mongo_base import CRUDMongo
+
+from ..models.bundle import TranslationBundle
+from ..models.translation import Translation
+from .crud_locale import crud_locale
+from .crud_translation import _resolve_text, crud_translation
+
+# Above this many changed keys, affected bundles are recompiled instead of patched key by key
+MAX_INCREMENTAL_KEYS = 100
+
+# Attempts to patch or recompile bundles that keep being changed concurrently
+MAX_ATTEMPTS = 3
+
+# Build time of placeholder bundles, which reserve a version while a bundle
+# is first compiled and are never served
+PLACEHOLDER_BUILT_AT = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def bundle_max_age() -> int:
+    """
+    Return the age in seconds after which a bundle is recompiled.
+
+    Bundles only see writes made outside the API through the change stream
+    watcher; without it they are not kept longer than a cached map.
+    """
+    if settings.locale_CHANGE_STREAM_ENABLED:
+        return settings.locale_BUNDLE_MAX_AGE
+    return min(settings.locale_BUNDLE_MAX_AGE, settings.locale_CACHE_MAP_SOFT_TTL)
+
+
+def bundle_id(locale: str, module_name: str) -> str:
+    """Return the id of the bundle of a locale and module."""
+    return f"{locale}:{module_name}"
+
+
+def _patch_update(keys: List[str], entries: List[Dict[str, str]], now: datetime) -> List[Dict[str, Any]]:
+    """
+    Build the update pipeline replacing the entries of changed keys in a bundle.
+
+    Entries of all the keys are removed and the given current entries are
+    appended, in a single update that also increments the version. Keys and
+    texts are passed as literals, since they may start with "$".
+    """
+    return [{
+        "$set": {
+            "entries": {
+                "$concatArrays": [
+                    {
+                        "$filter": {
+                            "input": "$entries",
+                            "cond": {"$not": [{"$in": ["$$this.k", {"$literal": keys}]}]},
+                        },
+                    },
+                    {"$literal": entries},
+                ],
+            },
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+            "updated_at": now,
+        },
+    }]
+
+
+class CRUDBundle(CRUDMongo[TranslationBundle, Any, Any]):
+    async def get_maps(
+        self, pairs: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Dict[str, str]]:
+        """
+        Get the compiled translation maps of several locales and modules.
+
+        Bundles are fetched by id with one query. Missing bundles, and bundles
+        older than the maximum age (see bundle_max_age), are compiled from the
+        translations with one query and stored, unless a translation write
+        changed them in the meantime.
+
+        Args:
+            pairs: (locale, module) pairs
+
+        Returns:
+            Dictionary of translation maps keyed by (locale, module)
+
+        Raises:
+            ValueError: If a locale or module name is invalid
+        """
+        pairs = list(dict.fromkeys(pairs))
+        if not settings.locale_BUNDLES_ENABLED:
+            maps, _ = await self._compile(pairs)
+            return maps
+
+        collection = self.engine.get_collection(TranslationBundle)
+        oldest = datetime.now(timezone.utc) - timedelta(seconds=bundle_max_age())
+        maps: Dict[Tuple[str, str], Dict[str, str]] = {}
+        versions: Dict[Tuple[str, str], int] = {}
+
+        async for bundle in collection.find({"_id": {"$in": [bundle_id(*pair) for pair in pairs]}}):
+            pair = (bundle["locale"], bundle["module"])
+            built_at = bundle["built_at"]
+            if built_at.tzinfo is None:
+                built_at = built_at.replace(tzinfo=timezone.utc)
+            if built_at < oldest:
+                versions[pair] = bundle.get("version", 0)
+                continue
+            maps[pair] = {entry["k"]: entry["v"] for entry in bundle["entries"]}
+
+        missing = [pair for pair in pairs if pair not in maps]
+        if missing:
+            # Versions must be known before compiling, see _store
+            versions.update(await self._reserve([pair for pair in missing if pair not in versions]))
+            compiled, ids = await self._compile(missing)
+            for pair, translations_map in compiled.items():
+                maps[pair] = translations_map
+                if translations_map:
+                    await self._store(*pair, translations_map, ids, version=versions[pair])
+                else:
+                    await collection.delete_one({"_id": bundle_id(*pair), "version": versions[pair]})
+
+        return maps
+
+    async def get_map(self, locale: str, module_name: str) -> Dict[str, str]:
+        """Get the compiled translation map of a locale and module."""
+        return (await self.get_maps([(locale, module_name)]))[(locale, module_name)]
+
+    async def _compile(
+        self, pairs: List[Tuple[str, str]]
+    ) -> Tuple[Dict[Tuple[str, str], Dict[str, str]], Dict[str, Any]]:
+        """Compile translation maps from the translations with one query,
+        returning them with the document id of every key."""
+        compiled, ids = await crud_translation.get_translations_maps_with_ids(
+            locales=list(dict.fromkeys(locale for locale, _ in pairs)),
+            modules=list(dict.fromkeys(module_name for _, module_name in pairs)),
+        )
+        return {pair: compiled.get(pair, {}) for pair in pairs}, ids
+
+    async def _reserve(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """
+        Insert placeholder bundles (version 0) for bundles about to be compiled.
+
+        A translation write while the bundle is compiled then patches the
+        placeholder, so storing the compiled bundle fails its version check
+        instead of overwriting the write. Placeholders are never served.
+        """
+        if not pairs:
+            return {}
+        now = datetime.now(timezone.utc)
+        try:
+            await self.engine.get_collection(TranslationBundle).bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": bundle_id(locale, module_name)},
+                        {"$setOnInsert": {
+                            "locale": locale,
+                            "module": module_name,
+                            "entries": [],
+                            "version": 0,
+                            "built_at": PLACEHOLDER_BUILT_AT,
+                            "updated_at": now,
+                        }},
+                        upsert=True,
+                    )
+                    for locale, module_name in pairs
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            # Only concurrent inserts of the same bundles are expected
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        # A bundle inserted concurrently has a newer version, storing over it fails
+        return {pair: 0 for pair in pairs}
+
+    async def _versions(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Return the current versions of bundles, reserving the missing ones."""
+        versions = {
+            (bundle["locale"], bundle["module"]): bundle.get("version", 0)
+            async for bundle in self.engine.get_collection(TranslationBundle).find(
+                {"_id": {"$in": [bundle_id(*pair) for pair in pairs]}},
+                {"locale": 1, "module": 1, "version": 1},
+            )
+        }
+        versions.update(await self._reserve([pair for pair in pairs if pair not in versions]))
+        return versions
+
+    async def _store(
+        self,
+        locale: str,
+        module_name: str,
+        translations_map: Dict[str, str],
+        ids: Dict[str, Any],
+        version: int,
+    ) -> bool:
+        """
+        Store a compiled bundle, unless it was changed since it was read.
+
+        The bundle is only replaced if it still has the version read before
+        compiling it. Every change of a bundle increments its version.
+
+        Returns:
+            Whether the bundle was stored
+        """
+        now = datetime.now(timezone.utc)
+        result = await self.engine.get_collection(TranslationBundle).update_one(
+            {"_id": bundle_id(locale, module_name), "version": version},
+            {
+                "$set": {
+                    "locale": locale,
+                    "module": module_name,
+                    "entries": [
+                        {"k": key, "v": text, "i": ids.get(key)} for key, text in translations_map.items()
+                    ],
+                    "built_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"version": 1},
+            },
+        )
+        return result.matched_count > 0
+
+    async def sync_keys(self, keys: Iterable[str], modules: Iterable[str] = ()) -> None:
+        """
+        Bring the stored bundles up to date after translation keys changed.
+
+        Each bundle of the keys' modules gets the keys' current texts, and keys
+        deleted or removed from one of the given modules are removed from that
+        module's bundles. Many keys at once recompile the affected bundles.
+
+        Bundle versions are read before the texts, and a bundle is only patched
+        if its version is unchanged, so a patch made from older texts never
+        overwrites a newer one. Bundles changed concurrently are patched again,
+        and dropped (to be recompiled when next read) if that keeps failing.
+
+        Args:
+            keys: The changed translation keys
+            modules: Modules the keys were in before the change, if they may have left them
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys or not settings.locale_BUNDLES_ENABLED:
+            return
+
+        translations = crud_translation.engine.get_collection(Translation)
+        affected_modules = set(modules)
+        async for document in translations.find({"key": {"$in": keys}}, {"_id": 0, "modules": 1}):
+            affected_modules.update(document.get("modules", []))
+        if not affected_modules:
+            return
+
+        collection = self.engine.get_collection(TranslationBundle)
+        bundles: List[Tuple[str, str, str, int]] = []
+        for _ in range(MAX_ATTEMPTS):
+            bundles = [
+                (bundle["_id"], bundle["locale"], bundle["module"], bundle.get("version", 0))
+                async for bundle in collection.find(
+                    {"module": {"$in": sorted(affected_modules)}}, {"locale": 1, "module": 1, "version": 1}
+                )
+            ]
+            if not bundles:
+                return
+
+            if len(keys) > MAX_INCREMENTAL_KEYS:
+                await self.rebuild(pairs=[(locale, module_name) for _, locale, module_name, _ in bundles])
+                return
+
+            documents = [
+                document
+                async for document in translations.find(
+                    {"key": {"$in": keys}}, {"key": 1, "modules": 1, "translations": 1}
+                )
+            ]
+
+            now = datetime.now(timezone.utc)
+            operations = [
+                UpdateOne(
+                    {"_id": _id, "version": version},
+                    _patch_update(
+                        keys,
+                        [
+                            {
+                                "k": document["key"],
+                                "v": _resolve_text(document, locale, module_name),
+                                "i": document["_id"],
+                            }
+                            for document in documents
+                            if module_name in document.get("modules", [])
+                        ],
+                        now,
+                    ),
+                )
+                for _id, locale, module_name, version in bundles
+            ]
+            result = await collection.bulk_write(operations, ordered=False)
+            if result.matched_count == len(operations):
+                return
+
+        # Bundles kept changing while being patched
+        await collection.delete_many({"_id": {"$in": [_id for _id, _, _, _ in bundles]}})
+
+    async def locate(self, document_id: Any) -> Tuple[Set[str], Set[str]]:
+        """
+        Find a translation document in the bundles by its id, e.g. after it
+        was deleted.
+
+        Returns:
+            Tuple of the keys it was compiled under and the modules of the
+            bundles containing it
+        """
+        keys: Set[str] = set()
+        modules: Set[str] = set()
+        async for bundle in self.engine.get_collection(TranslationBundle).find(
+            {"entries.i": document_id}, {"module": 1, "entries.$": 1}
+        ):
+            modules.add(bundle["module"])
+            keys.update(entry["k"] for entry in bundle.get("entries", []))
+        return keys, modules
+
+    async def rebuild(
+        self,
+        locales: Optional[List[str]] = None,
+        modules: Optional[List[str]] = None,
+        pairs: Optional[List[Tuple[str, str]]] = None,
+    ) -> int:
+        """
+        Recompile bundles from the translations, one query per module.
+
+        Without arguments, the bundles of all active locales and all modules
+        are rebuilt. Bundles whose map turns out empty are removed. Bundles
+        changed by a translation write while being recompiled are recompiled
+        again.
+
+        Args:
+            locales: Locale codes to rebuild
+            modules: Module names to rebuild
+            pairs: Explicit (locale, module) pairs to rebuild, instead of locales and modules
+
+        Returns:
+            Number of bundles stored
+        """
+        if pairs is None:
+            if not locales:
+                locales = [locale.code for locale in await crud_locale.get_active(limit=1000)]
+            if not modules:
+                modules = await crud_translation.get_modules()
+            pairs = [(locale, module_name) for module_name in modules for locale in locales]
+
+        by_module: Dict[str, List[str]] = {}
+        for locale, module_name in pairs:
+            by_module.setdefault(module_name, []).append(locale)
+
+        collection = self.engine.get_collection(TranslationBundle)
+        stored = 0
+        for module_name, module_locales in by_module.items():
+            pending = list(dict.fromkeys(module_locales))
+            for _ in range(MAX_ATTEMPTS):
+                # Versions must be known before compiling, see _store
+                versions = await self._versions([(locale, module_name) for locale in pending])
+                compiled, ids = await crud_translation.get_translations_maps_with_ids(pending, [module_name])
+                changed = []
+                for locale in pending:
+                    translations_map = compiled.get((locale, module_name), {})
+                    version = versions[(locale, module_name)]
+                    if translations_map:
+                        if await self._store(locale, module_name, translations_map, ids, version=version):
+                            stored += 1
+                            continue
+                    else:
+                        result = await collection.delete_one(
+                            {"_id": bundle_id(locale, module_name), "version": version}
+                        )
+                        if result.deleted_count:
+                            continue
+                    changed.append(locale)
+                pending = changed
+                if not pending:
+                    break
+        return stored
+
+    async def clear(self) -> None:
+        """Remove all bundles, so they are recompiled when next needed."""
+        await self.engine.get_collection(TranslationBundle).delete_many({})
+
+
+# Create a singleton instance
+crud_bundle = CRUDBundle(TranslationBundle)
@@ -18,8 +18,9 @@ class CRUDLocale(CRUDMongo[Locale, LocaleCreate, LocaleUpdate]):
         Returns:
             List of active locales
         """
-        cursor = self.engine.get_collection(Locale.__collection__).find({"active": True}).sort([("sort_order", 1), ("name", 1)]).skip(skip).limit(limit)
-        return await cursor.to_list(length=limit, callbacks=lambda x: Locale(**x))
+        collection = self.engine.get_collection(Locale)
+        cursor = collection.find({"active": True}).sort([("sort_order", 1), ("name", 1)]).skip(skip).limit(limit)
+        return [Locale.model_validate_doc(document) for document in await cursor.to_list(length=limit)]
 
 
 # Create a singleton instance
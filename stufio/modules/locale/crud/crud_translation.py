@@ -1,11 +1,102 @@
 from operator import call
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Any, Tuple
 from motor.core import AgnosticDatabase
 from datetime import datetime, timezone
-
-from ..models.translation import Translation, LocaleTranslation
-from ..schemas.translation import LocaleTranslationCreate, TranslationCreate, TranslationUpdate
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..models.translation import Translation
+from ..schemas.translation import (
+    LocaleTranslationCreate,
+    TranslationCreate,
+    TranslationImportItem,
+    TranslationUpdate,
+)
 from stufio.crud.mongo_base import CRUDMongo
+from ..services.fallback import fallback_chain
+from ..services.metrics import map_build_seconds
+
+
+class TranslationImportError(Exception):
+    """A bulk import failed partway; the keys written before the failure are kept."""
+
+    def __init__(self, counts: Dict[str, int], errors: List[Dict[str, Any]]):
+        super().__init__(f"{len(errors)} translation keys could not be imported")
+        self.counts = counts
+        self.errors = errors
+
+
+def _check_field_name(name: str) -> str:
+    """Ensure a locale or module name can be used as a MongoDB field path segment."""
+    if not name or "." in name or name.startswith("$"):
+        raise ValueError(f"Invalid locale or module name '{name}'")
+    return name
+
+
+def _locale_projection(locales: Iterable[str], module_names: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Projection reading only the key and the texts and module overrides of some
+    locales, including the locales they fall back to.
+    """
+    projection = {"_id": 0, "key": 1}
+    module_names = [_check_field_name(module_name) for module_name in module_names if module_name]
+    for requested in locales:
+        for locale in fallback_chain(_check_field_name(requested)):
+            projection[f"translations.{_check_field_name(locale)}.text"] = 1
+            for module_name in module_names:
+                projection[f"translations.{locale}.module_overrides.{module_name}"] = 1
+    return projection
+
+
+def _resolve_text(document: Dict[str, Any], locale: str, module_name: Optional[str] = None) -> str:
+    """
+    Get the text of a raw translation document for a locale, applying the module
+    override if there is one. A locale that is not translated falls back along
+    its fallback chain, and to the key itself if none of them is translated.
+    """
+    translations = document.get("translations") or {}
+    for candidate in fallback_chain(locale):
+        locale_trans = translations.get(candidate)
+        if locale_trans is None:
+            continue
+
+        overrides = locale_trans.get("module_overrides") or {}
+        if module_name and module_name in overrides:
+            return overrides[module_name]
+
+        if "text" in locale_trans:
+            return locale_trans["text"]
+
+    return document["key"]
+
+
+def _upsert_update(
+    now: datetime,
+    modules: Optional[List[str]] = None,
+    translations: Optional[Dict[str, LocaleTranslationCreate]] = None,
+    description: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Build an update document that creates or updates a translation key in place,
+    setting only the nested paths of the given locales and module overrides.
+    """
+    to_set: Dict[str, Any] = {"updated_at": now}
+    if description is not None:
+        to_set["description"] = description
+
+    for locale, locale_trans in (translations or {}).items():
+        prefix = f"translations.{_check_field_name(locale)}"
+        to_set[f"{prefix}.text"] = locale_trans.text
+        to_set[f"{prefix}.updated_at"] = now
+        if locale_trans.description is not None:
+            to_set[f"{prefix}.description"] = locale_trans.description
+        for module, override_text in (locale_trans.module_overrides or {}).items():
+            to_set[f"{prefix}.module_overrides.{_check_field_name(module)}"] = override_text
+
+    update: Dict[str, Any] = {"$set": to_set, "$setOnInsert": {"created_at": now}}
+    if modules:
+        update["$addToSet"] = {"modules": {"$each": list(dict.fromkeys(modules))}}
+    return update
 
 
 class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdate]):
@@ -38,6 +129,49 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
 
         return await self.get_multi(filters=raw_filter, skip=skip, limit=limit)
 
+    async def get_page(
+        self,
+        module_name: Optional[str] = None,
+        locale: Optional[str] = None,
+        *,
+        after: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Translation], Optional[str]]:
+        """
+        Retrieve a page of translations ordered by key, starting after a given key.
+
+        Pages are selected with a range on the unique key index instead of
+        skipping documents, so deep pages are as fast as the first one.
+        
+        Args:
+            module_name: Optional module name filter
+            locale: Optional locale code filter
+            after: Last key of the previous page
+            limit: Maximum number of records to return
+            
+        Returns:
+            The translations and the last key if more records follow, else None
+
+        Raises:
+            ValueError: If the locale name is invalid
+        """
+        raw_filter: Dict[str, Any] = {}
+        if module_name:
+            raw_filter["modules"] = module_name
+        if locale:
+            raw_filter[f"translations.{_check_field_name(locale)}"] = {"$exists": True}
+        if after is not None:
+            raw_filter["key"] = {"$gt": after}
+
+        collection = self.engine.get_collection(Translation)
+        # Fetch one extra document to know whether another page follows
+        cursor = collection.find(raw_filter).sort("key", 1).limit(limit + 1)
+        documents = await cursor.to_list(length=limit + 1)
+
+        translations = [Translation.model_validate_doc(document) for document in documents[:limit]]
+        last_key = translations[-1].key if len(documents) > limit else None
+        return translations, last_key
+
     async def get_by_key(self, key: str) -> Optional[Translation]:
         """Get a translation by its key."""
         return await self.get_by_field(field="key", value=key)
@@ -46,11 +180,17 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
         """Get all translations for a specific module."""
         return await self.get_multi(filters={"modules": module_name})
 
+    async def get_modules(self) -> List[str]:
+        """Get the names of all modules that have translations."""
+        collection = self.engine.get_collection(Translation)
+        return sorted(await collection.distinct("modules"))
+
     async def get_translation(
         self, key: str, locale: str, module_name: Optional[str] = None
     ) -> Optional[str]:
         """
-        Get a specific translation text by key and locale, with optional module override.
+        Get a specific translation text by key and locale, with optional module override
+        and falling back along the locale's fallback chain.
         
         Args:
             key: Translation key
@@ -59,23 +199,40 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
             
         Returns:
             Translation text or None if not found
+
+        Raises:
+            ValueError: If the locale or module name is invalid
         """
-        translation = await self.get_by_key(key=key)
-        if not translation:
+        collection = self.engine.get_collection(Translation)
+        document = await collection.find_one({"key": key}, _locale_projection([locale], [module_name]))
+        if not document:
             return None
 
-        if  locale not in translation.translations:
-            return translation.key
-
-        # Get the locale translation
-        locale_trans = translation.translations[locale]
+        return _resolve_text(document, locale, module_name)
 
-        # Check for module override if module is specified
-        if module_name and module_name in locale_trans.module_overrides:
-            return locale_trans.module_overrides[module_name]
+    async def get_translations_texts(
+        self, keys: List[str], locale: str, module_name: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Get the texts of many translation keys in one query, with optional module override.
+        
+        Args:
+            keys: Translation keys
+            locale: Locale code
+            module_name: Optional module to check for overrides
+            
+        Returns:
+            Dictionary with the texts of the keys that exist
+        """
+        if not keys:
+            return {}
 
-        # Otherwise return the default text
-        return locale_trans.text
+        collection = self.engine.get_collection(Translation)
+        cursor = collection.find({"key": {"$in": list(keys)}}, _locale_projection([locale], [module_name]))
+        return {
+            document["key"]: _resolve_text(document, locale, module_name)
+            async for document in cursor
+        }
 
     async def upsert_translation(
         self,
@@ -88,11 +245,15 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
         module_override: Optional[Dict[str, str]] = None,
     ) -> Translation:
         """
-        Create or update a translation.
+        Create or update a translation in one atomic update.
         
         You can either:
         1. Pass a dictionary of translations to update/create multiple locales at once
         2. Pass locale and text to update a single locale translation
+
+        Only the nested paths of the given locales and module overrides are
+        written and modules are added to the existing ones, so concurrent edits
+        of other locales are not lost.
         
         Args:
             key: The translation key
@@ -105,83 +266,90 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
             
         Returns:
             Updated Translation object
-        """
-        # Try to find existing translation
-        translation = await self.get_by_key(key=key)
-        now = datetime.now(timezone.utc)
 
-        if not translation:
-            # Create new translation
-            translation_data = {
-                "key": key,
-                "modules": modules,
-                "created_at": now,
-                "updated_at": now,
-                "translations": {},
+        Raises:
+            ValueError: If a locale or module name is invalid
+        """
+        if not translations and locale and text is not None:
+            translations = {
+                locale: LocaleTranslationCreate(text=text, module_overrides=module_override or {})
             }
 
-            if description:
-                translation_data["description"] = description
-
-            translation = Translation(**translation_data)
-        else:
-            # Update timestamp
-            translation.updated_at = now
-
-            # Update modules if provided
-            if modules:
-                translation.modules = list(set(modules))  # Ensure unique values
-
-            # Update description if provided
-            if description is not None:
-                translation.description = description
-
-        # Handle bulk translations update
-        if translations:
-            for locale_code, locale_trans in translations.items():
-                # Check if locale already exists
-                if locale_code in translation.translations:
-                    # Update existing locale translation
-                    locale_translation = translation.translations[locale_code]
-                    locale_translation.text = locale_trans.text
-                    locale_translation.updated_at = now
-
-                    # Update module overrides if provided
-                    if locale_trans.module_overrides:
-                        for module, override_text in locale_trans.module_overrides.items():
-                            locale_translation.module_overrides[module] = override_text
-                else:
-                    # Add new locale translation
-                    translation.translations[locale_code] = LocaleTranslation(
-                        text=locale_trans.text,
-                        module_overrides=locale_trans.module_overrides or {},
-                        created_at=now,
-                        updated_at=now
-                    )
-
-        # Handle single locale update
-        elif locale and text is not None:
-            if locale in translation.translations:
-                # Update existing locale
-                locale_translation = translation.translations[locale]
-                locale_translation.text = text
-                locale_translation.updated_at = now
-
-                # Add module override if provided
-                if module_override:
-                    for module, override_text in module_override.items():
-                        locale_translation.module_overrides[module] = override_text
-            else:
-                # Add new locale
-                translation.translations[locale] = LocaleTranslation(
-                    text=text,
-                    module_overrides=module_override or {},
-                    created_at=now,
-                    updated_at=now
+        now = datetime.now(timezone.utc)
+        collection = self.engine.get_collection(Translation)
+        document = await collection.find_one_and_update(
+            {"key": key},
+            _upsert_update(now, modules, translations, description),
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        # Locales added by this update get their creation time, unless a
+        # concurrent update has set it in the meantime
+        for locale_code, locale_trans in document.get("translations", {}).items():
+            if "created_at" not in locale_trans:
+                await collection.update_one(
+                    {"key": key, f"translations.{locale_code}.created_at": {"$exists": False}},
+                    {"$set": {f"translations.{locale_code}.created_at": now}},
                 )
+                locale_trans["created_at"] = now
 
-        # Save translation
-        return await self.engine.save(translation)
+        return Translation.model_validate_doc(document)
+
+    async def bulk_upsert(
+        self, items: List[TranslationImportItem], batch_size: int = 1000
+    ) -> Dict[str, int]:
+        """
+        Create or update many translation keys with batched bulk writes.
+
+        Each key becomes one upsert that sets only the given locales and module
+        overrides and adds the given modules, so existing locales are kept.
+        
+        Args:
+            items: Translation keys to import
+            batch_size: Number of operations sent per bulk write
+            
+        Returns:
+            Counts of matched, modified and upserted keys
+
+        Raises:
+            ValueError: If a locale or module name is invalid
+            TranslationImportError: If keys of a batch could not be written, with
+                the counts so far and the failed keys; later batches are not sent
+        """
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                {"key": item.key},
+                _upsert_update(now, item.modules, item.translations, item.description),
+                upsert=True,
+            )
+            for item in items
+        ]
+
+        collection = self.engine.get_collection(Translation)
+        counts = {"matched": 0, "modified": 0, "upserted": 0}
+        for i in range(0, len(operations), batch_size):
+            try:
+                result = await collection.bulk_write(operations[i:i + batch_size], ordered=False)
+            except BulkWriteError as e:
+                # The other operations of the unordered batch were still applied
+                counts["matched"] += e.details.get("nMatched", 0)
+                counts["modified"] += e.details.get("nModified", 0)
+                counts["upserted"] += e.details.get("nUpserted", 0)
+                raise TranslationImportError(counts, [
+                    {
+                        "key": items[i + error["index"]].key,
+                        "code": error.get("code"),
+                        "message": error.get("errmsg", ""),
+                    }
+                    for error in e.details.get("writeErrors", [])
+                ]) from e
+            counts["matched"] += result.matched_count
+            counts["modified"] += result.modified_count
+            counts["upserted"] += result.upserted_count
+
+        return counts
 
     async def upsert_module_override(
         self,
@@ -191,7 +359,7 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
         text: str,
     ) -> Translation:
         """
-        Set a module-specific override for a translation.
+        Set a module-specific override for a translation in one atomic update.
         
         Args:
             key: Translation key
@@ -201,27 +369,197 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
             
         Returns:
             Updated Translation object
+
+        Raises:
+            ValueError: If the translation or its locale does not exist, or a name is invalid
         """
-        translation = await self.get_by_key(key=key)
+        prefix = f"translations.{_check_field_name(locale)}"
+        now = datetime.now(timezone.utc)
 
-        if not translation:
-            raise ValueError(f"Translation with key '{key}' not found")
+        collection = self.engine.get_collection(Translation)
+        document = await collection.find_one_and_update(
+            {"key": key, prefix: {"$exists": True}},
+            {
+                "$set": {
+                    f"{prefix}.module_overrides.{_check_field_name(module_name)}": text,
+                    f"{prefix}.updated_at": now,
+                    "updated_at": now,
+                },
+                # Ensure module is in the modules list
+                "$addToSet": {"modules": module_name},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
 
-        if locale not in translation.translations:
+        if document is None:
+            if not await collection.count_documents({"key": key}, limit=1):
+                raise ValueError(f"Translation with key '{key}' not found")
             raise ValueError(f"Locale '{locale}' not found in translation '{key}'")
 
-        # Ensure module is in the modules list
-        if module_name not in translation.modules:
-            translation.modules.append(module_name)
+        return Translation.model_validate_doc(document)
 
-        # Add or update the module override
-        translation.translations[locale].module_overrides[module_name] = text
-        translation.translations[locale].updated_at = datetime.now(timezone.utc)
-        translation.updated_at = datetime.now(timezone.utc)
+    def iter_translations_map(
+        self,
+        locale: str,
+        module_name: str,
+        skip: int = 0,
+        limit: int = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Iterate over the (key, text) pairs of a module and locale, applying
+        module-specific overrides, fetching documents in cursor batches.
+
+        Only the key and the texts and module overrides of the requested locale
+        and its fallbacks are read from MongoDB, and documents are not hydrated
+        into models.
+        
+        Args:
+            locale: Locale code
+            module_name: Module name
+            batch_size: Number of documents fetched per cursor batch
 
-        # Save changes
-        await self.engine.save(translation)
-        return translation
+        Raises:
+            ValueError: If the locale or module name is invalid
+        """
+        collection = self.engine.get_collection(Translation)
+        cursor = collection.find(
+            {"modules": module_name}, _locale_projection([locale], [module_name])
+        ).batch_size(batch_size)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        async def pairs() -> AsyncIterator[Tuple[str, str]]:
+            async for document in cursor:
+                yield document["key"], _resolve_text(document, locale, module_name)
+
+        return pairs()
+
+    async def get_translations_maps(
+        self, locales: List[str], modules: List[str]
+    ) -> Dict[Tuple[str, str], Dict[str, str]]:
+        """
+        Get the flat translation maps of several locales and modules with one query,
+        applying module-specific overrides.
+
+        Only the keys, modules and the requested locales' (and their fallbacks')
+        texts and overrides are read, and each document contributes to every
+        map it belongs to.
+        
+        Args:
+            locales: Locale codes
+            modules: Module names
+            
+        Returns:
+            Dictionary of translation maps keyed by (locale, module)
+
+        Raises:
+            ValueError: If a locale or module name is invalid
+        """
+        maps, _ = await self.get_translations_maps_with_ids(locales, modules)
+        return maps
+
+    async def get_translations_maps_with_ids(
+        self, locales: List[str], modules: List[str]
+    ) -> Tuple[Dict[Tuple[str, str], Dict[str, str]], Dict[str, Any]]:
+        """
+        Get the translation maps of several locales and modules like
+        get_translations_maps, along with the document id of every key.
+
+        Returns:
+            Tuple of the translation maps keyed by (locale, module) and the
+            document ids keyed by translation key
+        """
+        projection = {**_locale_projection(locales, modules), "_id": 1, "modules": 1}
+
+        maps: Dict[Tuple[str, str], Dict[str, str]] = {
+            (locale, module_name): {} for locale in locales for module_name in modules
+        }
+        ids: Dict[str, Any] = {}
+        collection = self.engine.get_collection(Translation)
+        with map_build_seconds.time():
+            async for document in collection.find({"modules": {"$in": list(modules)}}, projection):
+                ids[document["key"]] = document["_id"]
+                for module_name in document.get("modules", []):
+                    for locale in locales:
+                        translations_map = maps.get((locale, module_name))
+                        if translations_map is not None:
+                            translations_map[document["key"]] = _resolve_text(document, locale, module_name)
+        return maps, ids
+
+    async def get_coverage(
+        self, modules: List[str], locales: Iterable[str] = ()
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Count the translated, missing and overridden keys of each locale and module
+        with a single aggregation.
+
+        Args:
+            modules: Module names
+            locales: Locales to report even if they have no translations
+            
+        Returns:
+            Dictionary of per-locale counts, sorted by locale, keyed by module
+        """
+        pipeline = [
+            {"$match": {"modules": {"$in": list(modules)}}},
+            {"$project": {
+                "modules": 1,
+                "locales": {"$objectToArray": {"$ifNull": ["$translations", {}]}},
+            }},
+            {"$unwind": "$modules"},
+            {"$match": {"modules": {"$in": list(modules)}}},
+            {"$facet": {
+                "keys": [
+                    {"$group": {"_id": "$modules", "count": {"$sum": 1}}},
+                ],
+                "translated": [
+                    {"$unwind": "$locales"},
+                    {"$group": {
+                        "_id": {"module": "$modules", "locale": "$locales.k"},
+                        "count": {"$sum": 1},
+                        "overridden": {"$sum": {"$cond": [
+                            {"$in": ["$modules", {"$map": {
+                                "input": {"$objectToArray": {"$ifNull": ["$locales.v.module_overrides", {}]}},
+                                "in": "$$this.k",
+                            }}]},
+                            1,
+                            0,
+                        ]}},
+                    }},
+                ],
+            }},
+        ]
+
+        collection = self.engine.get_collection(Translation)
+        result = (await collection.aggregate(pipeline).to_list(length=1))[0]
+
+        keys = {group["_id"]: group["count"] for group in result["keys"]}
+        translated = {
+            (group["_id"]["module"], group["_id"]["locale"]): group
+            for group in result["translated"]
+        }
+
+        coverage: Dict[str, List[Dict[str, Any]]] = {}
+        for module_name in modules:
+            total = keys.get(module_name, 0)
+            module_locales = set(locales) | {
+                locale for translated_module, locale in translated if translated_module == module_name
+            }
+            coverage[module_name] = []
+            for locale in sorted(module_locales):
+                group = translated.get((module_name, locale), {})
+                coverage[module_name].append({
+                    "module": module_name,
+                    "locale": locale,
+                    "keys": total,
+                    "translated": group.get("count", 0),
+                    "missing": total - group.get("count", 0),
+                    "overridden": group.get("overridden", 0),
+                })
+        return coverage
 
     async def get_translations_map(
         self, locale: str, module_name: str, skip: int = 0, limit: int = None
@@ -237,38 +575,70 @@ class CRUDTranslation(CRUDMongo[Translation, TranslationCreate, TranslationUpdat
         Returns:
             Dictionary with translation keys and texts
         """
-        translations = await self.get_multi(
-            filters={"modules": module_name}, skip=skip, limit=limit
-        )
+        with map_build_seconds.time():
+            return {
+                key: text
+                async for key, text in self.iter_translations_map(
+                    locale, module_name, skip=skip, limit=limit
+                )
+            }
+
+    def iter_documents(
+        self,
+        module_name: Optional[str] = None,
+        locale: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over raw translation documents sorted by key, optionally only
+        those of a module and/or having a locale, fetching them in cursor batches.
+        
+        Args:
+            module_name: Optional module name filter
+            locale: Optional locale code filter
+            batch_size: Number of documents fetched per cursor batch
+
+        Raises:
+            ValueError: If the locale name is invalid
+        """
+        raw_filter: Dict[str, Any] = {}
+        if module_name:
+            raw_filter["modules"] = module_name
+        if locale:
+            raw_filter[f"translations.{_check_field_name(locale)}"] = {"$exists": True}
 
-        result = {}
-        for translation in translations:
-            if translation.translations and locale in translation.translations:
-                result[translation.key] = translation.translations[locale].text
-                if module_name in translation.translations[locale].module_overrides:
-                    result[translation.key] = translation.translations[locale].module_overrides[module_name]
-            else:
-                result[translation.key] = translation.key
+        collection = self.engine.get_collection(Translation)
+        cursor = collection.find(raw_filter).sort("key", 1).batch_size(batch_size)
 
-        return result
+        async def documents() -> AsyncIterator[Dict[str, Any]]:
+            async for document in cursor:
+                document["id"] = document.pop("_id")
+                yield document
+
+        return documents()
 
     async def delete_locale_translation(
         self, key: str, locale: str
-    ) -> bool:
+    ) -> Optional[List[str]]:
         """
-        Remove a specific locale from a translation.
+        Remove a specific locale from a translation in one atomic update.
+
+        Returns:
+            The modules of the translation if the locale was removed, None otherwise
         """
-        translation = await self.get_by_key(key=key)
-        if not translation:
-            return False
+        prefix = f"translations.{_check_field_name(locale)}"
 
-        if locale in translation.translations:
-            del translation.translations[locale]
-            translation.updated_at = datetime.now(timezone.utc)
-            await self.engine.save(translation)
-            return True
+        collection = self.engine.get_collection(Translation)
+        document = await collection.find_one_and_update(
+            {"key": key, prefix: {"$exists": True}},
+            {"$unset": {prefix: ""}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            projection={"_id": 0, "modules": 1},
+        )
+
+        if document is None:
+            return None
 
-        return False
+        return document.get("modules", [])
 
 
 # Create a singleton instance
@@ -0,0 +1,67 @@
+from functools import lru_cache
+from typing import AbstractSet, Optional, Tuple
+
+
+@lru_cache(maxsize=1024)
+def parse_accept_language(header: str) -> Tuple[str, ...]:
+    """Parse an Accept-Language header into language ranges, best first.
+
+    Ranges are ordered by q-value, keeping the header order among equal
+    q-values. Ranges with q=0 or a malformed q-value are left out.
+    """
+    ranges = []
+    for position, item in enumerate(header.split(",")):
+        language, _, params = item.partition(";")
+        language = language.strip().replace("_", "-").lower()
+        if not language:
+            continue
+
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0 or quality > 1:
+            continue
+        ranges.append((-quality, position, language))
+
+    return tuple(language for _, _, language in sorted(ranges))
+
+
+def lookup_locale(language_range: str, supported: AbstractSet[str]) -> Optional[str]:
+    """Find the best supported locale for a language range (RFC 4647 lookup).
+
+    Subtags are dropped from the end of the range until a supported locale
+    matches, e.g. "de-ch-1996" tries "de-ch-1996", "de-ch" and "de".
+    Matching is case-insensitive.
+    """
+    by_tag = {code.replace("_", "-").lower(): code for code in supported}
+    tag = language_range
+    while tag:
+        if tag in by_tag:
+            return by_tag[tag]
+        tag = tag.rpartition("-")[0]
+        # A single-letter subtag (e.g. the "x" of "x-private") never stands alone
+        if tag[-2:-1] == "-":
+            tag = tag[:-2]
+    return None
+
+
+@lru_cache(maxsize=1024)
+def negotiate_locale(header: str, supported: AbstractSet[str]) -> Optional[str]:
+    """Return the supported locale best matching an Accept-Language header, if any.
+
+    Results are memoized per header and locale set, since real traffic only
+    has a small number of distinct headers. Pass the same frozenset object
+    on every call, so its cached hash makes lookups cheap.
+    """
+    for language_range in parse_accept_language(header):
+        if language_range == "*":
+            continue
+        locale = lookup_locale(language_range, supported)
+        if locale is not None:
+            return locale
+    return None
@@ -1,15 +1,74 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Optional
+from urllib.parse import parse_qsl
+from starlette.types import ASGIApp, Receive, Scope, Send
+from stufio.core.config import settings
+from ..services.locale_registry import locale_registry
+from .accept_language import lookup_locale, negotiate_locale
 
-class LocaleMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Extract locale from request headers or query parameters
-        locale = request.headers.get("Accept-Language") or request.query_params.get("locale", "en")
 
-        # Store the locale in the request state for later use
-        request.state.locale = locale
+def resolve_locale(query_locale: Optional[str], accept_language: Optional[str]) -> str:
+    """
+    Pick the active locale of a request: an explicit `locale` query parameter,
+    else the best match of the Accept-Language header, else the default locale.
+    """
+    supported = locale_registry.supported
+    if query_locale:
+        locale = lookup_locale(query_locale.replace("_", "-").lower(), supported)
+        if locale is not None:
+            return locale
+    if accept_language:
+        locale = negotiate_locale(accept_language, supported)
+        if locale is not None:
+            return locale
+    return settings.locale_DEFAULT_LOCALE
 
-        # Call the next middleware or endpoint
-        response: Response = await call_next(request)
 
-        return response
+def _query_locale(query_string: bytes) -> Optional[str]:
+    """Return the last `locale` query parameter, like Starlette's QueryParams.get."""
+    if b"locale" not in query_string:
+        return None
+    locale = None
+    for name, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        if name == "locale":
+            locale = value
+    return locale
+
+
+def _accept_language(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers") or ():
+        if name == b"accept-language":
+            return value.decode("latin-1")
+    return None
+
+
+class LocaleMiddleware:
+    """
+    Negotiate the locale of each HTTP request and store it as `request.state.locale`.
+
+    A plain ASGI middleware: it only reads the request line and headers, so
+    responses, including streamed ones, pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if not locale_registry.loaded:
+            try:
+                await locale_registry.ensure_loaded()
+            except Exception:
+                # Never loaded: fall back to the default locale rather than failing
+                # the request; the registry logs failed loads and backs off
+                pass
+
+        # Request.state is backed by scope["state"]
+        scope.setdefault("state", {})["locale"] = resolve_locale(
+            _query_locale(scope.get("query_string", b"")),
+            _accept_language(scope),
+        )
+
+        await self.app(scope, receive, send)
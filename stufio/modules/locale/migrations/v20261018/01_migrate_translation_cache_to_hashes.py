@@ -0,0 +1,55 @@
+import re
+from collections import defaultdict
+from motor.core import AgnosticDatabase
+from stufio.core.migrations.base import MongoMigrationScript
+from stufio.db.redis import RedisClient
+from ...services.cache_service import cache_service
+
+
+class MigrateTranslationCacheToHashes(MongoMigrationScript):
+    name = "migrate_translation_cache_to_hashes"
+    description = "Move cached translations from per-key strings into per-locale/module hashes"
+    migration_type = "data"
+    order = 10
+
+    # Keys written with an embedded generation namespace, e.g. translation:en:3.1:key:module
+    namespaced_key = re.compile(r"^\d+\.\d+:")
+
+    async def run(self, db: AgnosticDatabase) -> None:
+        redis = await RedisClient()
+
+        # Group legacy "translation:{locale}:{key}:{module}" strings by catalog
+        catalogs = defaultdict(dict)
+        expirations = defaultdict(int)
+        legacy_keys = []
+
+        async for cache_key in redis._client.scan_iter(match="translation:*", count=1000):
+            legacy_keys.append(cache_key)
+            if await redis._client.type(cache_key) != "string":
+                continue
+
+            _, locale, rest = cache_key.split(":", 2)
+            if ":" not in rest or self.namespaced_key.match(rest):
+                continue
+            key, module = rest.rsplit(":", 1)
+
+            value = await redis.get(cache_key)
+            if value is None:
+                continue
+            catalogs[(locale, module)][key] = value
+            ttl = await redis._client.ttl(cache_key)
+            expirations[(locale, module)] = max(expirations[(locale, module)], ttl if ttl > 0 else 3600)
+
+        for (locale, module), translations in catalogs.items():
+            await cache_service.set_bulk_translations(
+                locale,
+                translations,
+                None if module == "default" else module,
+                expiration=expirations[(locale, module)],
+            )
+
+        # Drop the legacy string keys in batches
+        for i in range(0, len(legacy_keys), 1000):
+            batch = legacy_keys[i:i+1000]
+            if batch:
+                await redis._client.delete(*batch)
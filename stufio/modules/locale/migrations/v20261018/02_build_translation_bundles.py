@@ -0,0 +1,27 @@
+from motor.core import AgnosticDatabase
+from stufio.core.migrations.base import MongoMigrationScript
+from ...crud.crud_bundle import crud_bundle
+
+
+class BuildTranslationBundles(MongoMigrationScript):
+    name = "build_translation_bundles"
+    description = "Create the compiled translation bundles of all active locales and modules"
+    migration_type = "data"
+    order = 20
+
+    async def run(self, db: AgnosticDatabase) -> None:
+        await db.command({
+            "createIndexes": "i18n_bundles",
+            "indexes": [
+                {
+                    "key": {"module": 1, "locale": 1},
+                    "name": "bundle_module_locale_lookup",
+                },
+                {
+                    "key": {"entries.i": 1},
+                    "name": "bundle_translation_lookup",
+                },
+            ],
+        })
+
+        await crud_bundle.rebuild()
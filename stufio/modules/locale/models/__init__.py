@@ -1,4 +1,5 @@
+from .bundle import TranslationBundle
 from .locale import Locale
 from .translation import Translation
 
-__all__ = ["Locale", "Translation"]
\ No newline at end of file
+__all__ = ["Locale", "Translation", "TranslationBundle"]
\ No newline at end of file
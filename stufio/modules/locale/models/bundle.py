@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import List, Optional
+from odmantic import Field, Index, EmbeddedModel, Model, ObjectId
+
+from stufio.db.mongo_base import datetime_now_sec
+
+
+class BundleEntry(EmbeddedModel):
+    """Embedded model for one key of a compiled bundle.
+
+    Entries are kept as a list because translation keys contain dots,
+    which cannot be used in MongoDB field paths.
+    """
+    k: str = Field(description="The translation key")
+    v: str = Field(description="The resolved text, with module overrides applied")
+    i: Optional[ObjectId] = Field(default=None, description="The id of the translation document")
+
+
+class TranslationBundle(Model):
+    """MongoDB model for the compiled translation map of a locale and module."""
+    id: str = Field(primary_field=True, description="The bundle id, '{locale}:{module}'")
+    locale: str = Field(description="The locale code")
+    module: str = Field(description="The module name")
+    entries: List[BundleEntry] = Field(default_factory=list, description="The resolved translations")
+    version: int = Field(default=0, description="Incremented on every change of the bundle")
+    built_at: datetime = Field(default_factory=datetime_now_sec)
+    updated_at: datetime = Field(default_factory=datetime_now_sec)
+
+    model_config = {
+        "collection": "i18n_bundles",
+        "indexes": lambda: [
+            Index("module", "locale"),
+            Index("entries.i"),
+        ],
+    }
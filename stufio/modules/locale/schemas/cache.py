@@ -0,0 +1,24 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class CacheWarmupResult(BaseModel):
+    """Schema for the outcome of a translation cache warm-up."""
+    locales: int = Field(..., description="Number of active locales")
+    modules: int = Field(..., description="Number of modules with translations")
+    bundles: int = Field(..., description="Number of locale+module maps built")
+    skipped: int = Field(0, description="Number of maps that were already cached")
+    failed: int = Field(0, description="Number of maps that failed to build")
+    duration: float = Field(..., description="Warm-up duration in seconds")
+
+
+class BundleRebuild(BaseModel):
+    """Schema for a request to recompile translation bundles."""
+    locales: Optional[List[str]] = Field(None, description="Locales to rebuild, all active locales if not given")
+    modules: Optional[List[str]] = Field(None, description="Modules to rebuild, all modules if not given")
+
+
+class BundleRebuildResult(BaseModel):
+    """Schema for the outcome of a translation bundle rebuild."""
+    bundles: int = Field(..., description="Number of bundles stored")
+    duration: float = Field(..., description="Rebuild duration in seconds")
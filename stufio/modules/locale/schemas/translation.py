@@ -69,7 +69,43 @@ class TranslationResponse(TranslationInDB):
     pass
 
 
+class TranslationPage(BaseModel):
+    """Schema for a page of translations with a continuation cursor."""
+    items: List[TranslationResponse] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, None on the last page")
+
+
+class TranslationCoverage(BaseModel):
+    """Schema for the translation coverage of a locale in a module."""
+    module: str = Field(..., description="The module name")
+    locale: str = Field(..., description="The locale code")
+    keys: int = Field(..., description="Number of translation keys in the module")
+    translated: int = Field(..., description="Number of keys translated in the locale")
+    missing: int = Field(..., description="Number of keys not translated in the locale")
+    overridden: int = Field(..., description="Number of keys with an override for the module in the locale")
+
+
 class ModuleOverrideUpdate(BaseModel):
     """Schema for updating a module-specific translation."""
     text: str = Field(..., description="The module-specific translation text")
     module: str = Field(..., description="The module name for this override")
+
+
+class TranslationImportItem(BaseModel):
+    """Schema for one translation key in a bulk import."""
+    key: str = Field(..., description="The translation key")
+    modules: List[str] = Field(..., description="Modules this translation applies to")
+    description: Optional[str] = Field(None, description="Optional description of this translation key")
+    translations: Dict[str, LocaleTranslationCreate] = Field(default_factory=dict)
+
+
+class TranslationImport(BaseModel):
+    """Schema for a bulk import of translations."""
+    items: List[TranslationImportItem] = Field(..., description="Translation keys to create or update")
+
+
+class TranslationImportResult(BaseModel):
+    """Schema for the outcome of a bulk import of translations."""
+    matched: int = Field(0, description="Number of existing translation keys matched")
+    modified: int = Field(0, description="Number of existing translation keys modified")
+    upserted: int = Field(0, description="Number of translation keys created")
@@ -1,137 +1,1004 @@
-from typing import Dict, Optional, List
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, List, Set, Tuple
 from stufio.db.redis import RedisClient
 from stufio.core.config import settings
+from . import serialization
+from .fallback import fallback_chain
+from .metrics import cache_invalidations, cache_lookups, cache_miss_seconds, map_payload_bytes
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel used to propagate invalidations between workers
+INVALIDATION_CHANNEL = "i18n:cache:invalidate"
+
+# Above this many changed keys, invalidations ask other workers to drop the
+# entries of all single keys instead of listing the keys
+MAX_PUBLISHED_KEYS = 1000
+
+# Negative entries deleted per DEL command
+DELETE_BATCH_SIZE = 1000
+
+# Compare-and-delete, so a lock is only released by the worker holding it
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class CachedMap:
+    """A cached translations map, kept as its encoded JSON response body,
+    with the body's ETag and the time (epoch seconds) it was built."""
+    body: str
+    built_at: float
+    etag: str = ""
+
+    def __post_init__(self):
+        if not self.etag:
+            self.etag = serialization.content_etag(self.body)
+
+    def decode(self) -> Dict[str, str]:
+        return serialization.loads(self.body)
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with a per-entry TTL.
+
+    Keys are tuples whose second and third items are the locale and module,
+    which allows invalidating every entry of a locale, a module or both.
+    Entries of single translation keys end with the translation key.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value like get, without counting a lookup or refreshing its recency."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value for its own TTL (the cache TTL by default),
+        evicting the least recently used entries if full."""
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, locale: Optional[str] = None, module: Optional[str] = None, key: Optional[str] = None) -> int:
+        """Drop entries matching a locale, module and/or translation key (None matches any).
+
+        Entries of locales falling back to the given locale match it as well.
+        """
+        stale = [
+            cache_key for cache_key in self._entries
+            if (
+                locale is None
+                or cache_key[1] == locale
+                or (cache_key[0] != "missing" and locale in fallback_chain(cache_key[1]))
+            )
+            and (module is None or cache_key[2] == module)
+            and (key is None or (cache_key[0] in ("text", "missing") and cache_key[-1] == key))
+        ]
+        for cache_key in stale:
+            del self._entries[cache_key]
+        return len(stale)
+
+    def invalidate_keys(self, keys: Optional[Iterable[str]] = None) -> int:
+        """Drop the entries of single translation keys (texts and negative
+        entries) of the given keys, or of every key if None, in one pass."""
+        keys = None if keys is None else set(keys)
+        stale = [
+            cache_key for cache_key in self._entries
+            if cache_key[0] in ("text", "missing") and (keys is None or cache_key[-1] in keys)
+        ]
+        for cache_key in stale:
+            del self._entries[cache_key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size limits and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
 
 class CacheService:
     """Service for caching translations using Redis."""
-    
+
+    def __init__(self):
+        self._local: Optional[LocalCache] = None
+        self._instance_id = uuid.uuid4().hex
+        self._listener_task: Optional[asyncio.Task] = None
+        self._single_flight = SingleFlight()
+        self._refresh_tasks: Dict[tuple, asyncio.Task] = {}
+        self._topic_handlers: Dict[str, List[Callable[[], None]]] = {}
+        # Number of invalidations applied in process, to detect one landing during a read
+        self._invalidations = 0
+
+    @property
+    def local_cache(self) -> Optional[LocalCache]:
+        """In-process cache tier, or None when disabled in settings."""
+        if not settings.locale_CACHE_L1_ENABLED:
+            return None
+        if self._local is None:
+            self._local = LocalCache(
+                max_size=settings.locale_CACHE_L1_MAX_SIZE,
+                ttl=settings.locale_CACHE_L1_TTL,
+            )
+        return self._local
+
+    def _local_get(self, key: tuple) -> Optional[Any]:
+        local = self.local_cache
+        if local is None:
+            return None
+        self.ensure_listener()
+        return local.get(key)
+
+    def _local_set(self, key: tuple, value: Any, ttl: Optional[float] = None) -> None:
+        local = self.local_cache
+        if local is not None:
+            local.set(key, value, ttl)
+
+    def _local_set_missing(self, key: str, expiration: Optional[int] = None) -> None:
+        """Remember in process that a translation key does not exist, no longer
+        than its negative entry lives in Redis."""
+        ttl = min(expiration or settings.locale_CACHE_NEGATIVE_TTL, settings.locale_CACHE_L1_TTL)
+        self._local_set(("missing", "*", "*", key), True, ttl)
+
+    def _local_set_current(
+        self, key: tuple, value: Any, locale: str, module: Optional[str], namespace: str
+    ) -> None:
+        """Set an in-process entry built or read under a namespace, unless that
+        namespace was invalidated while the entry was being built or read."""
+        local = self.local_cache
+        if local is not None and local.peek(("gen", locale, module or "default")) == namespace:
+            local.set(key, value)
+
+    def get_local_stats(self) -> Dict[str, Any]:
+        """Return statistics of the in-process cache tier."""
+        local = self.local_cache
+        if local is None:
+            return {"enabled": False}
+        return {"enabled": True, **local.stats()}
+
+    @staticmethod
+    def _generation_key(locale: Optional[str], module: Optional[str]) -> str:
+        """Redis counter for a locale, a module (all locales) or a locale+module."""
+        if module is None:
+            return f"i18n_gen:{locale}"
+        if locale is None:
+            return f"i18n_gen_module:{module}"
+        return f"i18n_gen:{locale}:{module}"
+
+    def _namespace_keys(self, locale: str, module: str) -> List[str]:
+        """Generation counters making up the namespace of a locale+module.
+
+        The generations of the locales in the fallback chain are included, so
+        changes to a fallback locale invalidate the locales that use it.
+        """
+        chain = fallback_chain(locale)
+        return [
+            *(self._generation_key(candidate, None) for candidate in chain),
+            self._generation_key(None, module),
+            *(self._generation_key(candidate, module) for candidate in chain),
+        ]
+
+    async def _get_namespace(self, redis: Any, locale: str, module: Optional[str] = None) -> str:
+        """Return the cache namespace (locale, module and locale+module generations).
+
+        Generations only ever grow, so entries written under an older namespace
+        are never read again and simply expire.
+        """
+        module = module or "default"
+        local_key = ("gen", locale, module)
+        namespace = self._local_get(local_key)
+        if namespace is not None:
+            return namespace
+
+        invalidations = self._invalidations
+        generations = await redis._client.mget(self._namespace_keys(locale, module))
+        namespace = ".".join(str(generation or 0) for generation in generations)
+        if self._invalidations == invalidations:
+            self._local_set(local_key, namespace)
+        return namespace
+
+    async def _get_namespaces(
+        self, redis: Any, pairs: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], str]:
+        """Return the cache namespaces of many locale+module pairs with at most one MGET."""
+        namespaces: Dict[Tuple[str, str], str] = {}
+        pending: List[Tuple[str, str]] = []
+        for locale, module in pairs:
+            namespace = self._local_get(("gen", locale, module))
+            if namespace is not None:
+                namespaces[(locale, module)] = namespace
+            else:
+                pending.append((locale, module))
+
+        if pending:
+            namespace_keys = [self._namespace_keys(locale, module) for locale, module in pending]
+            invalidations = self._invalidations
+            generations = iter(await redis._client.mget([
+                generation_key for keys in namespace_keys for generation_key in keys
+            ]))
+            for (locale, module), keys in zip(pending, namespace_keys):
+                namespace = ".".join(str(next(generations) or 0) for _ in keys)
+                if self._invalidations == invalidations:
+                    self._local_set(("gen", locale, module), namespace)
+                namespaces[(locale, module)] = namespace
+
+        return namespaces
+
+    async def _catalog_key(
+        self, redis: Any, locale: str, module: Optional[str] = None, namespace: Optional[str] = None
+    ) -> str:
+        """Return the Redis hash holding the catalog of a locale+module,
+        in the current namespace unless one is given."""
+        if namespace is None:
+            namespace = await self._get_namespace(redis, locale, module)
+        return f"translation_catalog:{locale}:{module or 'default'}:{namespace}"
+
     async def get_translation(self, locale: str, key: str, module: Optional[str] = None) -> Optional[str]:
         """Retrieve a translation from the cache by locale and key."""
+        local_key = ("text", locale, module or "default", key)
+        cached = self._local_get(local_key)
+        if cached is not None:
+            cache_lookups.inc(kind="text", source="l1")
+            return cached
+
         redis = await RedisClient()
-        # Use module-specific key if provided, otherwise use default
-        cache_key = f"translation:{locale}:{key}:{module or 'default'}"
-        return await redis.get(cache_key)
-    
-    async def set_translation(self, locale: str, key: str, value: str, module: Optional[str] = None, expiration: int = 3600) -> None:
-        """Set a translation in the cache with an expiration time."""
-        redis = await RedisClient()
-        cache_key = f"translation:{locale}:{key}:{module or 'default'}"
-        await redis.set(cache_key, value, ex=expiration)
-    
-    async def set_bulk_translations(self, locale: str, translations: Dict[str, str], module: Optional[str] = None, expiration: int = 3600) -> None:
-        """Set multiple translations in the cache for a locale."""
+        # Use module-specific catalog if provided, otherwise use default
+        namespace = await self._get_namespace(redis, locale, module)
+        catalog_key = await self._catalog_key(redis, locale, module, namespace)
+        value = await redis._client.hget(catalog_key, key)
+        if value is not None:
+            cache_lookups.inc(kind="text", source="redis")
+            # Not if the namespace was invalidated during the read
+            self._local_set_current(local_key, value, locale, module, namespace)
+        else:
+            cache_lookups.inc(kind="text", source="miss")
+        return value
+
+    async def set_translation(
+        self,
+        locale: str,
+        key: str,
+        value: str,
+        module: Optional[str] = None,
+        expiration: int = 3600,
+        namespace: Optional[str] = None,
+    ) -> None:
+        """Set a translation in the cache with an expiration time.
+
+        Pass the namespace resolved before the text was read from the
+        database, so a text replaced meanwhile is not cached as current.
+        """
+        redis = await RedisClient()
+        if namespace is None:
+            namespace = await self._get_namespace(redis, locale, module)
+        await self.set_bulk_translations(locale, {key: value}, module, expiration=expiration, namespace=namespace)
+        self._local_set_current(("text", locale, module or "default", key), value, locale, module, namespace)
+
+    async def set_bulk_translations(
+        self,
+        locale: str,
+        translations: Dict[str, str],
+        module: Optional[str] = None,
+        expiration: int = 3600,
+        namespace: Optional[str] = None,
+    ) -> None:
+        """Set multiple translations in the cache for a locale, in the current namespace unless one is given."""
         if not translations:
             return
-            
+
         redis = await RedisClient()
+        catalog_key = await self._catalog_key(redis, locale, module, namespace)
         pipeline = redis._client.pipeline()  # Access underlying client for pipeline
-        
-        for key, value in translations.items():
-            cache_key = f"translation:{locale}:{key}:{module or 'default'}"
-            pipeline.set(cache_key, value, ex=expiration)
-            
+        pipeline.hset(catalog_key, mapping=translations)
+        pipeline.expire(catalog_key, expiration)
         await pipeline.execute()
-    
-    async def clear_translation(self, locale: str, key: str) -> None:
-        """Clear all cached versions of a translation (all modules)."""
+
+    def on_invalidate(self, topic: str, handler: Callable[[], None]) -> None:
+        """Call a handler in every worker when a topic is invalidated,
+        for in-process state kept outside the cache, such as the locale list."""
+        self._topic_handlers.setdefault(topic, []).append(handler)
+
+    def _notify(self, topics: Iterable[str]) -> None:
+        for topic in topics:
+            for handler in self._topic_handlers.get(topic, []):
+                handler()
+
+    async def invalidate(
+        self,
+        targets: List[Tuple[Optional[str], Optional[str]]],
+        keys: Iterable[str] = (),
+        topics: Iterable[str] = (),
+    ) -> None:
+        """Invalidate (locale, module) namespaces in one pipelined round-trip.
+
+        A target with module None covers the whole locale, one with locale
+        None covers the module in every locale. Negative entries of the given
+        translation keys are dropped as well, and the handlers of the given
+        topics are called in every worker. Other workers are sent the keys
+        only up to MAX_PUBLISHED_KEYS; for more, they drop the entries of
+        every single key.
+        """
+        keys = list(keys)
+        topics = list(topics)
+        if not targets and not keys and not topics:
+            return
+
         redis = await RedisClient()
-        pattern = f"translation:{locale}:{key}:*"
-        
-        async for key in redis._client.scan_iter(match=pattern):
-            await redis.delete(key)
-    
+        pipeline = redis._client.pipeline()
+        for locale, module in targets:
+            pipeline.incr(self._generation_key(locale, module))
+            scope = "locale" if module is None else "module" if locale is None else "locale_module"
+            cache_invalidations.inc(scope=scope)
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            pipeline.delete(*(f"translation_missing:{key}" for key in keys[start:start + DELETE_BATCH_SIZE]))
+        pipeline.publish(INVALIDATION_CHANNEL, json.dumps({
+            "origin": self._instance_id,
+            "targets": targets,
+            "keys": keys if len(keys) <= MAX_PUBLISHED_KEYS else None,
+            "topics": topics,
+        }))
+        await pipeline.execute()
+
+        self._invalidate_local(targets, keys)
+        self._notify(topics)
+
+    async def clear_translation(self, locale: str, key: str) -> None:
+        """Clear all cached versions of a translation (all modules).
+
+        The key may be cached in any module catalog of the locale, so this
+        bumps the locale generation, the same as clearing the whole locale.
+        """
+        await self.invalidate([(locale, None)])
+
     async def clear_module_translations(self, locale: str, module: str) -> None:
         """Clear all translations for a specific locale and module."""
-        redis = await RedisClient()
-        pattern = f"translation:{locale}:*:{module}"
-        
-        keys = []
-        async for key in redis._client.scan_iter(match=pattern):
-            keys.append(key)
-        
-        # Delete in batches
-        if keys:
-            for i in range(0, len(keys), 1000):
-                batch = keys[i:i+1000]
-                if batch:
-                    await redis._client.delete(*batch)
-        
-        # Also clear the translation map for this locale+module
-        map_key = f"translations_map:{locale}:{module}"
-        await redis.delete(map_key)
-    
+        await self.invalidate([(locale, module)])
+
     async def clear_all_translations(self, locale: str) -> None:
         """Clear all translations for a specific locale from the cache."""
-        redis = await RedisClient()
-        pattern = f"translation:{locale}:*"
-        
-        # Collect keys to delete
-        keys = []
-        async for key in redis._client.scan_iter(match=pattern):
-            keys.append(key)
-        
-        # Delete in batches
-        if keys:
-            for i in range(0, len(keys), 1000):
-                batch = keys[i:i+1000]
-                if batch:
-                    await redis._client.delete(*batch)
-        
-        # Also delete any translation maps
-        pattern = f"translations_map:{locale}:*"
-        async for key in redis._client.scan_iter(match=pattern):
-            await redis.delete(key)
-    
+        await self.invalidate([(locale, None)])
+
     async def get_translations_for_module(self, locale: str, module: str) -> Dict[str, str]:
         """Get all translations for a specific locale and module from the cache."""
-        redis = await RedisClient()
-        
         # Check for the cached map first
-        map_key = f"translations_map:{locale}:{module}"
-        cached_map = await redis.get(map_key)
-        if cached_map:
+        cached_map = await self.get_translations_map(locale, module)
+        if cached_map is not None:
+            return cached_map
+
+        redis = await RedisClient()
+        module_key = await self._catalog_key(redis, locale, module)
+        default_key = await self._catalog_key(redis, locale)
+
+        # Fall back to the catalogs, default translations (may be used as
+        # fallback) overridden by module-specific ones
+        pipeline = redis._client.pipeline()
+        pipeline.hgetall(default_key)
+        pipeline.hgetall(module_key)
+        default_catalog, module_catalog = await pipeline.execute()
+
+        result = dict(default_catalog or {})
+        result.update(module_catalog or {})
+        return result
+
+    async def _get_cached_map(self, locale: str, module: str) -> Optional[CachedMap]:
+        """Get a cached translations map together with its build time."""
+        local_key = ("map", locale, module)
+        cached = self._local_get(local_key)
+        if cached is not None:
+            cache_lookups.inc(kind="map", source="l1")
+            return cached
+
+        redis = await RedisClient()
+        namespace = await self._get_namespace(redis, locale, module)
+        map_key = f"translations_map:{locale}:{module}:{namespace}"
+        fields = await redis._client.hgetall(map_key)
+        if not fields or "body" not in fields:
+            cache_lookups.inc(kind="map", source="miss")
+            return None
+
+        cache_lookups.inc(kind="map", source="redis")
+
+        entry = CachedMap(
+            body=fields["body"],
+            built_at=float(fields.get("built_at", 0)),
+            etag=fields.get("etag", ""),
+        )
+        self._local_set_current(local_key, entry, locale, module, namespace)
+        return entry
+
+    async def has_translations_map(self, locale: str, module: str) -> bool:
+        """Whether a translations map is cached for a locale+module."""
+        return await self._get_cached_map(locale, module) is not None
+
+    async def get_translations_map(self, locale: str, module: str) -> Optional[Dict[str, str]]:
+        """Get a pre-built translations map from the cache, or None on a miss."""
+        entry = await self._get_cached_map(locale, module)
+        if entry is None:
+            return None
+
+        try:
+            return entry.decode()
+        except ValueError:
+            return None
+
+    async def set_translations_map(
+        self,
+        locale: str,
+        module: str,
+        translations_map: Dict[str, str],
+        expiration: Optional[int] = None,
+        namespace: Optional[str] = None,
+    ) -> CachedMap:
+        """Cache a pre-built translations map for fast retrieval.
+
+        The entry expires after the hard TTL; past the soft TTL it is still
+        served but refreshed in the background. Pass the namespace resolved
+        before the map was built, so a map built from data an invalidation
+        replaced meanwhile is not cached as current.
+        """
+        redis = await RedisClient()
+        if namespace is None:
+            namespace = await self._get_namespace(redis, locale, module)
+        map_key = f"translations_map:{locale}:{module}:{namespace}"
+        entry = CachedMap(body=serialization.dumps(translations_map), built_at=time.time())
+
+        pipeline = redis._client.pipeline()
+        pipeline.hset(map_key, mapping={
+            "body": entry.body,
+            "built_at": str(entry.built_at),
+            "etag": entry.etag,
+        })
+        pipeline.expire(map_key, expiration or settings.locale_CACHE_MAP_HARD_TTL)
+        await pipeline.execute()
+        self._local_set_current(("map", locale, module), entry, locale, module, namespace)
+        map_payload_bytes.set(len(entry.body.encode("utf-8")), locale=locale, module=module)
+        return entry
+
+    async def get_cached_maps(
+        self, pairs: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], CachedMap]:
+        """Get the cached translations maps of many locale+module pairs.
+
+        Maps not in the in-process tier are read with one pipelined HMGET per
+        map after resolving their namespaces with a single MGET. Pairs that are
+        not cached are left out of the result.
+        """
+        entries: Dict[Tuple[str, str], CachedMap] = {}
+        pending: List[Tuple[str, str]] = []
+        for pair in pairs:
+            cached = self._local_get(("map", *pair))
+            if cached is not None:
+                cache_lookups.inc(kind="map", source="l1")
+                entries[pair] = cached
+            else:
+                pending.append(pair)
+
+        if not pending:
+            return entries
+
+        redis = await RedisClient()
+        namespaces = await self._get_namespaces(redis, pending)
+        pipeline = redis._client.pipeline()
+        for locale, module in pending:
+            map_key = f"translations_map:{locale}:{module}:{namespaces[(locale, module)]}"
+            pipeline.hmget(map_key, ["body", "built_at", "etag"])
+
+        for pair, (body, built_at, etag) in zip(pending, await pipeline.execute()):
+            if body is None:
+                cache_lookups.inc(kind="map", source="miss")
+                continue
+            cache_lookups.inc(kind="map", source="redis")
+            entries[pair] = CachedMap(body=body, built_at=float(built_at or 0), etag=etag or "")
+            self._local_set_current(("map", *pair), entries[pair], *pair, namespaces[pair])
+
+        return entries
+
+    async def set_translations_maps(
+        self,
+        translations_maps: Dict[Tuple[str, str], Dict[str, str]],
+        expiration: Optional[int] = None,
+        namespaces: Optional[Dict[Tuple[str, str], str]] = None,
+    ) -> Dict[Tuple[str, str], CachedMap]:
+        """Cache many pre-built translations maps in one pipeline.
+
+        Empty maps are returned but, as in a single rebuild, not cached. Pass
+        the namespaces resolved before the maps were built, see
+        set_translations_map.
+        """
+        built_at = time.time()
+        entries = {
+            pair: CachedMap(body=serialization.dumps(translations_map), built_at=built_at)
+            for pair, translations_map in translations_maps.items()
+        }
+        cached = [pair for pair, translations_map in translations_maps.items() if translations_map]
+        if not cached:
+            return entries
+
+        redis = await RedisClient()
+        if namespaces is None:
+            namespaces = await self._get_namespaces(redis, cached)
+        pipeline = redis._client.pipeline()
+        for locale, module in cached:
+            entry = entries[(locale, module)]
+            map_key = f"translations_map:{locale}:{module}:{namespaces[(locale, module)]}"
+            pipeline.hset(map_key, mapping={
+                "body": entry.body,
+                "built_at": str(entry.built_at),
+                "etag": entry.etag,
+            })
+            pipeline.expire(map_key, expiration or settings.locale_CACHE_MAP_HARD_TTL)
+        await pipeline.execute()
+
+        for locale, module in cached:
+            entry = entries[(locale, module)]
+            self._local_set_current(("map", locale, module), entry, locale, module, namespaces[(locale, module)])
+            map_payload_bytes.set(len(entry.body.encode("utf-8")), locale=locale, module=module)
+        return entries
+
+    async def get_translations(
+        self, locale: str, keys: Iterable[str], module: Optional[str] = None
+    ) -> Tuple[Dict[str, str], Set[str]]:
+        """Look up many translations at once.
+
+        Keys not in the in-process tier are resolved with a single pipelined
+        HMGET on the catalog plus MGET of their negative entries.
+
+        Returns:
+            The cached texts and the keys known not to exist
+        """
+        found: Dict[str, str] = {}
+        missing: Set[str] = set()
+        pending: List[str] = []
+
+        for key in keys:
+            cached = self._local_get(("text", locale, module or "default", key))
+            if cached is not None:
+                cache_lookups.inc(kind="text", source="l1")
+                found[key] = cached
+            elif self._local_get(("missing", "*", "*", key)) is not None:
+                cache_lookups.inc(kind="missing", source="l1")
+                missing.add(key)
+            else:
+                pending.append(key)
+
+        if not pending:
+            return found, missing
+
+        redis = await RedisClient()
+        namespace = await self._get_namespace(redis, locale, module)
+        catalog_key = await self._catalog_key(redis, locale, module, namespace)
+        pipeline = redis._client.pipeline()
+        pipeline.hmget(catalog_key, pending)
+        pipeline.mget([f"translation_missing:{key}" for key in pending])
+        values, markers = await pipeline.execute()
+
+        for key, value, marker in zip(pending, values, markers):
+            if value is not None:
+                cache_lookups.inc(kind="text", source="redis")
+                found[key] = value
+                self._local_set_current(("text", locale, module or "default", key), value, locale, module, namespace)
+            elif marker is not None:
+                cache_lookups.inc(kind="missing", source="redis")
+                missing.add(key)
+                self._local_set_missing(key)
+            else:
+                cache_lookups.inc(kind="text", source="miss")
+
+        return found, missing
+
+    async def backfill_translations(
+        self,
+        locale: str,
+        translations: Dict[str, str],
+        missing: Iterable[str] = (),
+        module: Optional[str] = None,
+        expiration: int = 3600,
+        namespace: Optional[str] = None,
+    ) -> None:
+        """Cache looked up texts and negative entries of missing keys in one pipeline.
+
+        Pass the namespace resolved before the texts were read from the
+        database, see set_translation.
+        """
+        missing = list(missing)
+        if not translations and not missing:
+            return
+
+        redis = await RedisClient()
+        if namespace is None:
+            namespace = await self._get_namespace(redis, locale, module)
+        pipeline = redis._client.pipeline()
+        if translations:
+            catalog_key = await self._catalog_key(redis, locale, module, namespace)
+            pipeline.hset(catalog_key, mapping=translations)
+            pipeline.expire(catalog_key, expiration)
+        for key in missing:
+            pipeline.set(f"translation_missing:{key}", "1", ex=settings.locale_CACHE_NEGATIVE_TTL)
+        await pipeline.execute()
+
+        for key, value in translations.items():
+            self._local_set_current(("text", locale, module or "default", key), value, locale, module, namespace)
+        for key in missing:
+            self._local_set_missing(key)
+
+    async def is_translation_missing(self, key: str) -> bool:
+        """Whether a translation key is negatively cached as not existing."""
+        local_key = ("missing", "*", "*", key)
+        if self._local_get(local_key) is not None:
+            cache_lookups.inc(kind="missing", source="l1")
+            return True
+
+        redis = await RedisClient()
+        if await redis.get(f"translation_missing:{key}") is None:
+            return False
+
+        cache_lookups.inc(kind="missing", source="redis")
+        self._local_set_missing(key)
+        return True
+
+    async def set_translation_missing(self, key: str, expiration: Optional[int] = None) -> None:
+        """Negatively cache a translation key that does not exist."""
+        redis = await RedisClient()
+        await redis.set(f"translation_missing:{key}", "1", ex=expiration or settings.locale_CACHE_NEGATIVE_TTL)
+        self._local_set_missing(key, expiration)
+
+    async def get_or_build_translation(
+        self,
+        locale: str,
+        key: str,
+        module: Optional[str],
+        builder: Callable[[], Awaitable[Optional[str]]],
+        expiration: int = 3600,
+    ) -> Optional[str]:
+        """Return a cached translation, building it once per worker on a miss.
+
+        Keys the builder does not find are remembered for a short time, so
+        repeated lookups of unknown keys do not reach the database.
+        """
+        cached = await self.get_translation(locale, key, module)
+        if cached is not None:
+            return cached
+
+        if await self.is_translation_missing(key):
+            return None
+
+        async def rebuild() -> Optional[str]:
+            # Resolved before reading the database, see set_translation
+            redis = await RedisClient()
+            namespace = await self._get_namespace(redis, locale, module)
+            text = await builder()
+            if text is not None:
+                await self.set_translation(locale, key, text, module, expiration=expiration, namespace=namespace)
+            else:
+                await self.set_translation_missing(key)
+            return text
+
+        with cache_miss_seconds.time(kind="text"):
+            return await self._single_flight.do(("text", locale, module or "default", key), rebuild)
+
+    async def get_or_build_translations(
+        self,
+        locale: str,
+        keys: List[str],
+        module: Optional[str],
+        builder: Callable[[List[str]], Awaitable[Dict[str, str]]],
+        expiration: int = 3600,
+    ) -> Dict[str, str]:
+        """Look up many translations, building all uncached ones at once.
+
+        The builder gets the keys that are neither cached nor known not to
+        exist and returns the texts it finds; the other keys are remembered
+        as missing for a short time.
+        """
+        # Resolved before reading the database, see set_translation
+        redis = await RedisClient()
+        namespace = await self._get_namespace(redis, locale, module)
+
+        found, missing = await self.get_translations(locale, keys, module)
+        pending = [key for key in keys if key not in found and key not in missing]
+        if pending:
+            texts = await builder(pending)
+            await self.backfill_translations(
+                locale,
+                texts,
+                missing=[key for key in pending if key not in texts],
+                module=module,
+                expiration=expiration,
+                namespace=namespace,
+            )
+            found.update(texts)
+        return found
+
+    async def get_or_build_translations_map(
+        self,
+        locale: str,
+        module: str,
+        builder: Callable[[], Awaitable[Dict[str, str]]],
+        expiration: Optional[int] = None,
+    ) -> CachedMap:
+        """Return a cached translations map, rebuilding it once on a miss.
+
+        Concurrent misses in a worker share one rebuild. With the rebuild lock
+        enabled, workers that lose the Redis lock wait for the holder to cache
+        the map instead of querying the database themselves. A map older than
+        the soft TTL is returned as is while a background task rebuilds it.
+        """
+        entry = await self._get_cached_map(locale, module)
+        if entry is not None:
+            if time.time() - entry.built_at > settings.locale_CACHE_MAP_SOFT_TTL:
+                self._schedule_refresh(locale, module, builder, expiration)
+            return entry
+
+        with cache_miss_seconds.time(kind="map"):
+            return await self.refresh_translations_map(locale, module, builder, expiration)
+
+    async def get_or_build_translations_maps(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        builder: Callable[[List[Tuple[str, str]]], Awaitable[Dict[Tuple[str, str], Dict[str, str]]]],
+        expiration: Optional[int] = None,
+    ) -> Dict[Tuple[str, str], CachedMap]:
+        """Return the cached maps of many locale+module pairs, building all misses at once.
+
+        The builder gets the list of missing pairs and returns their maps, so
+        they can come from a single database query. Stale maps are returned
+        as is and refreshed in the background one by one.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        entries = await self.get_cached_maps(pairs)
+
+        now = time.time()
+        for (locale, module), entry in entries.items():
+            if now - entry.built_at > settings.locale_CACHE_MAP_SOFT_TTL:
+                self._schedule_refresh(locale, module, self._pair_builder(builder, (locale, module)), expiration)
+
+        missing = [pair for pair in pairs if pair not in entries]
+        if missing:
+            with cache_miss_seconds.time(kind="bundle"):
+                # Resolved before building, see set_translations_map
+                redis = await RedisClient()
+                namespaces = await self._get_namespaces(redis, missing)
+                built = await builder(missing)
+                entries.update(await self.set_translations_maps(
+                    {pair: built.get(pair, {}) for pair in missing},
+                    expiration=expiration,
+                    namespaces=namespaces,
+                ))
+        return entries
+
+    @staticmethod
+    def _pair_builder(
+        builder: Callable[[List[Tuple[str, str]]], Awaitable[Dict[Tuple[str, str], Dict[str, str]]]],
+        pair: Tuple[str, str],
+    ) -> Callable[[], Awaitable[Dict[str, str]]]:
+        """Adapt a multi-map builder to build the map of a single pair."""
+        async def build() -> Dict[str, str]:
+            return (await builder([pair])).get(pair, {})
+        return build
+
+    async def refresh_translations_map(
+        self,
+        locale: str,
+        module: str,
+        builder: Callable[[], Awaitable[Dict[str, str]]],
+        expiration: Optional[int] = None,
+    ) -> CachedMap:
+        """Rebuild and cache a translations map whether or not it is cached."""
+        return await self._single_flight.do(
+            ("map", locale, module),
+            lambda: self._rebuild_map(locale, module, builder, expiration),
+        )
+
+    async def _rebuild_map(
+        self,
+        locale: str,
+        module: str,
+        builder: Callable[[], Awaitable[Dict[str, str]]],
+        expiration: Optional[int] = None,
+        wait: bool = True,
+    ) -> Optional[CachedMap]:
+        """Build a map and cache it, holding the rebuild lock if enabled.
+
+        Returns None without building when another worker holds the lock and
+        either wait is False or its result did not show up in time.
+        """
+        lock_name = f"i18n_lock:map:{locale}:{module}"
+        token = None
+        if settings.locale_CACHE_REBUILD_LOCK_ENABLED:
+            token = await self.acquire_lock(lock_name, settings.locale_CACHE_REBUILD_LOCK_TTL)
+            if token is None:
+                if not wait:
+                    return None
+                cached = await self._wait_for_map(locale, module, settings.locale_CACHE_REBUILD_LOCK_WAIT)
+                if cached is not None:
+                    return cached
+
+        try:
+            # Resolved before building, see set_translations_map
+            redis = await RedisClient()
+            namespace = await self._get_namespace(redis, locale, module)
+            result = await builder()
+            if not result:
+                # Empty maps are not cached
+                return CachedMap(body=serialization.dumps(result or {}), built_at=time.time())
+            return await self.set_translations_map(
+                locale, module, result, expiration=expiration, namespace=namespace
+            )
+        finally:
+            if token is not None:
+                await self.release_lock(lock_name, token)
+
+    def _schedule_refresh(
+        self,
+        locale: str,
+        module: str,
+        builder: Callable[[], Awaitable[Dict[str, str]]],
+        expiration: Optional[int] = None,
+    ) -> None:
+        """Rebuild a stale map in the background, once per worker at a time."""
+        refresh_key = (locale, module)
+        if refresh_key in self._refresh_tasks:
+            return
+
+        task = asyncio.create_task(
+            self._rebuild_map(locale, module, builder, expiration, wait=False)
+        )
+        self._refresh_tasks[refresh_key] = task
+        task.add_done_callback(lambda done: self._refresh_done(refresh_key, done))
+
+    def _refresh_done(self, refresh_key: tuple, task: asyncio.Task) -> None:
+        self._refresh_tasks.pop(refresh_key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Background refresh of translations map %s:%s failed",
+                *refresh_key,
+                exc_info=task.exception(),
+            )
+
+    async def _wait_for_map(self, locale: str, module: str, timeout: float) -> Optional[CachedMap]:
+        """Poll the cache for a map another worker is rebuilding."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            cached = await self._get_cached_map(locale, module)
+            if cached is not None:
+                return cached
+        return None
+
+    async def acquire_lock(self, name: str, ttl: int) -> Optional[str]:
+        """Take a short-lived Redis lock, returning its token or None if held elsewhere."""
+        redis = await RedisClient()
+        token = uuid.uuid4().hex
+        if await redis._client.set(name, token, nx=True, ex=ttl):
+            return token
+        return None
+
+    async def release_lock(self, name: str, token: str) -> None:
+        """Release a lock taken with acquire_lock, unless it expired and was taken by someone else."""
+        redis = await RedisClient()
+        await redis._client.eval(RELEASE_LOCK_SCRIPT, 1, name, token)
+
+    def _invalidate_local(
+        self, targets: List[Tuple[Optional[str], Optional[str]]], keys: Optional[Iterable[str]] = ()
+    ) -> None:
+        """Drop in-process entries of the given (locale, module) targets and
+        entries of the given translation keys, or of every key if None."""
+        self._invalidations += 1
+        if self._local is None:
+            return
+        for locale, module in targets:
+            self._local.invalidate(locale, module=module)
+        if keys is None or keys:
+            self._local.invalidate_keys(keys)
+
+    def ensure_listener(self) -> None:
+        """Start the pub/sub listener the first time the in-process tier is used."""
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen_invalidations())
+
+    async def stop_invalidation_listener(self) -> None:
+        """Cancel the pub/sub listener task, if running."""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
             try:
-                import json
-                return json.loads(cached_map)
-            except:
-                # If there's an error parsing the JSON, continue to individual keys
+                await self._listener_task
+            except asyncio.CancelledError:
                 pass
-        
-        # Fall back to individual keys
-        pattern = f"translation:{locale}:*:{module}"
-        result = {}
-        
-        # Collect translations for the module
-        async for key in redis._client.scan_iter(match=pattern):
-            # Format is "translation:{locale}:{key}:{module}"
-            parts = key.split(":", 3)
-            if len(parts) >= 3:
-                original_key = parts[2]  # Get the translation key part
-                value = await redis.get(key)
-                if value:
-                    result[original_key] = value
-        
-        # Also check default translations (may be used as fallback)
-        pattern = f"translation:{locale}:*:default"
-        async for key in redis._client.scan_iter(match=pattern):
-            parts = key.split(":", 3)
-            if len(parts) >= 3:
-                original_key = parts[2]
-                # Only add if not already in module-specific results
-                if original_key not in result:
-                    value = await redis.get(key)
-                    if value:
-                        result[original_key] = value
-                
-        return result
-    
-    async def set_translations_map(self, locale: str, module: str, translations_map: Dict[str, str], expiration: int = 300) -> None:
-        """Cache a pre-built translations map for fast retrieval."""
-        redis = await RedisClient()
-        map_key = f"translations_map:{locale}:{module}"
-        
-        import json
-        await redis.set(map_key, json.dumps(translations_map), ex=expiration)
+            self._listener_task = None
+
+    async def _listen_invalidations(self) -> None:
+        """Apply invalidations published by other workers to the in-process tier."""
+        while True:
+            try:
+                redis = await RedisClient()
+                pubsub = redis._client.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        self._apply_invalidation(message["data"])
+                finally:
+                    await pubsub.unsubscribe(INVALIDATION_CHANNEL)
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Translation cache invalidation listener failed, reconnecting")
+                # Anything published while disconnected is missed, so start clean
+                if self._local is not None:
+                    self._local.clear()
+                await asyncio.sleep(1)
+
+    def _apply_invalidation(self, data: Any) -> None:
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return
+
+        if payload.get("origin") == self._instance_id:
+            return
+
+        self._invalidate_local(
+            [tuple(target) for target in payload.get("targets", [])],
+            payload.get("keys", []),
+        )
+        self._notify(payload.get("topics", []))
 
 # Create a singleton instance
 cache_service = CacheService()
@@ -0,0 +1,308 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+from pymongo.errors import OperationFailure
+from stufio.db.redis import RedisClient
+from stufio.core.config import settings
+from ..crud.crud_bundle import crud_bundle
+from ..crud.crud_translation import crud_translation
+from ..models.locale import Locale
+from ..models.translation import Translation
+from . import serialization
+from .cache_service import cache_service
+from .invalidation import InvalidationPlan
+from .locale_registry import LOCALES_TOPIC
+
+logger = logging.getLogger(__name__)
+
+# Only one worker in the cluster consumes the change streams at a time
+LEASE_KEY = "i18n_lock:change_watcher"
+# Resume token of the last handled change, shared by the lease holders
+RESUME_TOKEN_KEY = "i18n:change_watcher:resume_token"
+
+# Changes already waiting, e.g. of a bulk import, are applied with one flush
+# of up to this many events
+MAX_BATCH_EVENTS = 1000
+
+# Milliseconds the server waits for new changes before answering, which is
+# also how long a batch of changes waits for more to arrive
+MAX_AWAIT_TIME_MS = 100
+
+# Extend the lease only while it is still held by this worker
+RENEW_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def _locales(document: Optional[Dict[str, Any]]) -> Set[str]:
+    return set((document or {}).get("translations") or {})
+
+
+def _modules(document: Optional[Dict[str, Any]]) -> Set[str]:
+    return set((document or {}).get("modules") or [])
+
+
+def plan_translation_change(event: Dict[str, Any]) -> Optional[InvalidationPlan]:
+    """Work out the caches affected by a change event of a translation document.
+
+    Returns None when the change cannot be narrowed down, e.g. a delete, a
+    module change or a key rename without the document's pre-image, and every
+    locale must be invalidated. Deleted and renamed keys are added to the plan
+    under their old key, so their bundle entries are removed.
+    """
+    operation = event.get("operationType")
+    document = event.get("fullDocument")
+    before = event.get("fullDocumentBeforeChange")
+    plan = InvalidationPlan()
+
+    if operation == "insert" and document is not None:
+        return plan.add_translation(
+            _locales(document), _modules(document), membership_changed=True, key=document.get("key")
+        )
+
+    if operation in ("replace", "delete"):
+        if before is None:
+            return None
+        plan.add_translation(_locales(before), _modules(before), membership_changed=True, key=before.get("key"))
+        if document is not None:
+            plan.add_translation(
+                _locales(document), _modules(document), membership_changed=True, key=document.get("key")
+            )
+        return plan
+
+    if operation == "update":
+        if document is None and before is None:
+            return None
+
+        description = event.get("updateDescription") or {}
+        paths = [
+            *(description.get("updatedFields") or {}),
+            *(description.get("removedFields") or []),
+            *(truncated["field"] for truncated in description.get("truncatedArrays") or []),
+        ]
+
+        locales: Set[str] = set()
+        membership_changed = False
+        for path in paths:
+            field, _, rest = path.partition(".")
+            if field == "translations":
+                if rest:
+                    locales.add(rest.split(".", 1)[0])
+                elif before is None:
+                    # All locales were rewritten, removed ones are unknown
+                    return None
+                else:
+                    locales |= _locales(before) | _locales(document)
+            elif field == "modules":
+                if before is None:
+                    # Modules the key was removed from are unknown
+                    return None
+                membership_changed = True
+            elif field == "key":
+                if before is None:
+                    # The old key's bundle entries are only found by the document id
+                    return None
+                plan.add_key(before["key"])
+                membership_changed = True
+
+        return plan.add_translation(
+            locales,
+            _modules(document) | _modules(before),
+            membership_changed=membership_changed,
+            key=(document or {}).get("key"),
+        )
+
+    # drop, rename, dropDatabase and invalidate events
+    return None
+
+
+def plan_locale_change(event: Dict[str, Any]) -> InvalidationPlan:
+    """Work out the caches affected by a change event of a locale document."""
+    plan = InvalidationPlan().add_topic(LOCALES_TOPIC)
+    for document in (event.get("fullDocument"), event.get("fullDocumentBeforeChange")):
+        if document and document.get("code"):
+            plan.add_locale(document["code"])
+    return plan
+
+
+class ChangeWatcher:
+    """Invalidate translation caches from MongoDB change streams.
+
+    Changes written to the translations and locales collections by anything,
+    not only this module's API, are turned into cache invalidations. Workers
+    compete for a Redis lease so only one of them consumes the stream, and
+    the resume token is kept in Redis so a new lease holder continues where
+    the previous one stopped.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start watching in the background, if not already running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop watching, if running."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        lease_ttl = settings.locale_CHANGE_STREAM_LEASE_TTL
+        while True:
+            token = None
+            try:
+                token = await cache_service.acquire_lock(LEASE_KEY, lease_ttl)
+                if token is None:
+                    await asyncio.sleep(lease_ttl / 2)
+                    continue
+                logger.info("Watching translation changes")
+                await self._watch_while_leased(token, lease_ttl)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Translation change watcher failed, restarting")
+                await asyncio.sleep(1)
+            finally:
+                if token is not None:
+                    await asyncio.shield(cache_service.release_lock(LEASE_KEY, token))
+
+    async def _watch_while_leased(self, token: str, lease_ttl: int) -> None:
+        """Consume the change stream, renewing the lease until it is lost."""
+        consumer = asyncio.create_task(self._consume())
+        try:
+            while True:
+                done, _ = await asyncio.wait({consumer}, timeout=lease_ttl / 3)
+                if done:
+                    # Raises if the consumer failed
+                    consumer.result()
+                    return
+                if not await self._renew_lease(token, lease_ttl):
+                    logger.warning("Lost the translation change watcher lease")
+                    return
+        finally:
+            if not consumer.done():
+                consumer.cancel()
+                try:
+                    await consumer
+                except asyncio.CancelledError:
+                    pass
+
+    async def _renew_lease(self, token: str, lease_ttl: int) -> bool:
+        redis = await RedisClient()
+        return bool(await redis._client.eval(RENEW_LEASE_SCRIPT, 1, LEASE_KEY, token, lease_ttl))
+
+    async def _consume(self) -> None:
+        translations = crud_translation.engine.get_collection(Translation)
+        database = translations.database
+        collections = {
+            translations.name: plan_translation_change,
+            database[Locale.__collection__].name: plan_locale_change,
+        }
+
+        options: Dict[str, Any] = {"full_document": "updateLookup", "max_await_time_ms": MAX_AWAIT_TIME_MS}
+        if settings.locale_CHANGE_STREAM_PRE_IMAGES:
+            options["full_document_before_change"] = "whenAvailable"
+
+        redis = await RedisClient()
+        resume_token = await redis._client.get(RESUME_TOKEN_KEY)
+        if resume_token:
+            options["resume_after"] = serialization.loads(resume_token)
+
+        pipeline = [{"$match": {"ns.coll": {"$in": list(collections)}}}]
+        try:
+            await self._consume_stream(database.watch(pipeline, **options), collections)
+        except OperationFailure:
+            if "resume_after" not in options:
+                raise
+            # The token may no longer be in the oplog, changes since then are lost
+            logger.warning("Cannot resume translation change stream, invalidating all locales")
+            await redis._client.delete(RESUME_TOKEN_KEY)
+            await self._invalidate_all()
+            options.pop("resume_after")
+            await self._consume_stream(database.watch(pipeline, **options), collections)
+
+    async def _consume_stream(self, stream: Any, collections: Dict[str, Any]) -> None:
+        redis = await RedisClient()
+        async with stream:
+            async for event in stream:
+                events = [event]
+                while len(events) < MAX_BATCH_EVENTS:
+                    event = await stream.try_next()
+                    if event is None:
+                        break
+                    events.append(event)
+                await self._apply(events, collections)
+                await redis._client.set(RESUME_TOKEN_KEY, serialization.dumps(stream.resume_token))
+
+    async def _apply(self, events: List[Dict[str, Any]], collections: Dict[str, Any]) -> None:
+        """Invalidate what a batch of change events affects, with one flush."""
+        plan = InvalidationPlan()
+        invalidate_all = False
+        for event in events:
+            planner = collections.get((event.get("ns") or {}).get("coll"))
+            event_plan = planner(event) if planner is not None else None
+            if event_plan is None and planner is plan_translation_change:
+                event_plan = await self._plan_from_bundles(event)
+            if event_plan is None:
+                logger.info(
+                    "Translation change %s cannot be narrowed down, invalidating all locales",
+                    event.get("operationType"),
+                )
+                invalidate_all = True
+            else:
+                plan.merge(event_plan)
+
+        if invalidate_all:
+            await self._invalidate_all()
+        await plan.flush()
+
+    async def _plan_from_bundles(self, event: Dict[str, Any]) -> Optional[InvalidationPlan]:
+        """Work out a translation change that cannot be narrowed down from the
+        bundles its document was compiled into, found by the document id.
+
+        Texts of any locale may have changed, so every locale is invalidated,
+        but only the bundles of the document's modules are brought up to date.
+        """
+        if event.get("operationType") not in ("update", "replace", "delete"):
+            return None
+        document_id = (event.get("documentKey") or {}).get("_id")
+        if document_id is None or not settings.locale_BUNDLES_ENABLED:
+            return None
+
+        keys, modules = await crud_bundle.locate(document_id)
+        document = event.get("fullDocument")
+        plan = InvalidationPlan()
+        for code in await self._known_locales():
+            plan.add_locale(code)
+        plan.add_translation(
+            (), modules | _modules(document), membership_changed=True, key=(document or {}).get("key")
+        )
+        for key in keys:
+            plan.add_key(key)
+        return plan
+
+    async def _known_locales(self) -> Set[str]:
+        locales = crud_translation.engine.get_collection(Translation).database[Locale.__collection__]
+        return set(await locales.distinct("code")) | set(settings.locale_SUPPORTED_LOCALES)
+
+    async def _invalidate_all(self) -> None:
+        """Drop the compiled bundles and invalidate every known locale."""
+        await crud_bundle.clear()
+        plan = InvalidationPlan()
+        for code in await self._known_locales():
+            plan.add_locale(code)
+        await plan.flush()
+
+
+# Create a singleton instance
+change_watcher = ChangeWatcher()
@@ -0,0 +1,85 @@
+from typing import Any, Dict, Iterable, List, Optional
+from stufio.db.redis import RedisClient
+from stufio.core.config import settings
+from ..crud.crud_locale import crud_locale
+from ..crud.crud_translation import crud_translation
+from . import serialization
+
+# Redis keys holding the encoded coverage of each module, in a generation
+# that is bumped to drop the coverage of all modules at once, and a version
+# of the module that is bumped to drop its coverage
+COVERAGE_KEY = "i18n_coverage"
+COVERAGE_GENERATION_KEY = "i18n_coverage_gen"
+COVERAGE_VERSION_KEY = "i18n_coverage_version"
+
+
+def _version_key(module: str) -> str:
+    return f"{COVERAGE_VERSION_KEY}:{module}"
+
+
+def _coverage_key(generation: Optional[str], version: Optional[str], module: str) -> str:
+    return f"{COVERAGE_KEY}:{generation or 0}:{module}:{version or 0}"
+
+
+async def get_coverage(modules: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Return the translation coverage of modules, all of them by default.
+
+    Modules not in the cache are counted with one aggregation and cached
+    until a translation of theirs changes. Each module's entry expires after
+    the map hard TTL, so writes not seen by the API age out. Entries are
+    cached under the versions read before counting, so counts that a write
+    made stale while they were computed are never read.
+
+    Returns:
+        Per-locale counts of translated, missing and overridden keys, keyed by module
+    """
+    modules = modules or await crud_translation.get_modules()
+    if not modules:
+        return {}
+
+    redis = await RedisClient()
+    generation, *versions = await redis._client.mget(
+        [COVERAGE_GENERATION_KEY, *(_version_key(module) for module in modules)]
+    )
+    keys = {
+        module: _coverage_key(generation, version, module)
+        for module, version in zip(modules, versions)
+    }
+    coverage: Dict[str, List[Dict[str, Any]]] = {}
+    missing: List[str] = []
+    bodies = await redis._client.mget([keys[module] for module in modules])
+    for module, body in zip(modules, bodies):
+        if body is None:
+            missing.append(module)
+        else:
+            coverage[module] = serialization.loads(body)
+
+    if missing:
+        locales = [locale.code for locale in await crud_locale.get_active(limit=1000)]
+        computed = await crud_translation.get_coverage(missing, locales=locales)
+        pipeline = redis._client.pipeline()
+        for module, rows in computed.items():
+            pipeline.set(
+                keys[module],
+                serialization.dumps(rows),
+                ex=settings.locale_CACHE_MAP_HARD_TTL,
+            )
+        await pipeline.execute()
+        coverage.update(computed)
+
+    return coverage
+
+
+async def invalidate_coverage(modules: Optional[Iterable[str]] = None) -> None:
+    """Drop the cached coverage of modules, or of all modules if none are given."""
+    redis = await RedisClient()
+    if modules is None:
+        await redis._client.incr(COVERAGE_GENERATION_KEY)
+        return
+
+    modules = list(modules)
+    if modules:
+        pipeline = redis._client.pipeline()
+        for module in modules:
+            pipeline.incr(_version_key(module))
+        await pipeline.execute()
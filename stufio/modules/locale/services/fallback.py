@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+from stufio.core.config import settings
+
+
+@lru_cache(maxsize=1024)
+def build_fallback_chain(locale: str, fallback_locale: Optional[str] = None) -> Tuple[str, ...]:
+    """Return the locales to look a translation up in, most specific first.
+
+    Subtags are dropped one at a time as in RFC 4647 lookup, so "zh-Hant-TW"
+    falls back to "zh-Hant" and then "zh", and finally to the fallback locale.
+    """
+    chain = [locale]
+    tag = locale.replace("_", "-")
+    while "-" in tag:
+        tag = tag.rsplit("-", 1)[0]
+        # A single-letter subtag (e.g. the "x" of "x-private") never stands alone
+        if "-" in tag and len(tag.rsplit("-", 1)[1]) == 1:
+            tag = tag.rsplit("-", 1)[0]
+        if tag not in chain:
+            chain.append(tag)
+    if fallback_locale and fallback_locale not in chain:
+        chain.append(fallback_locale)
+    return tuple(chain)
+
+
+def fallback_chain(locale: str) -> Tuple[str, ...]:
+    """Return the fallback chain of a locale, or the locale alone when fallback is disabled."""
+    if not settings.locale_USE_FALLBACK:
+        return (locale,)
+    return build_fallback_chain(locale, settings.locale_FALLBACK_LOCALE)
@@ -0,0 +1,142 @@
+from typing import Iterable, List, Optional, Set, Tuple
+from stufio.core.config import settings
+from ..crud.crud_bundle import crud_bundle
+from .cache_service import cache_service
+from .coverage import invalidate_coverage
+
+
+class InvalidationPlan:
+    """Collects the cache namespaces affected by translation changes and
+    flushes the minimal set of them in a single Redis round-trip, after
+    bringing the compiled bundles of the changed keys up to date. The
+    coverage statistics of every module touched are dropped as well.
+
+    Namespaces are a whole locale, a module in every locale, or a single
+    locale+module; a locale+module is dropped when its locale or module is
+    already invalidated as a whole.
+    """
+
+    def __init__(self):
+        self.locales: Set[str] = set()
+        self.modules: Set[str] = set()
+        self.locale_modules: Set[Tuple[str, str]] = set()
+        self.keys: Set[str] = set()
+        self.touched_modules: Set[str] = set()
+        self.topics: Set[str] = set()
+
+    def add_locale(self, locale: str) -> "InvalidationPlan":
+        """Invalidate every cached translation and map of a locale."""
+        self.locales.add(locale)
+        return self
+
+    def add_module(self, module: str, locale: Optional[str] = None) -> "InvalidationPlan":
+        """Invalidate a module's maps in one locale, or in every locale if none is given."""
+        if locale is None:
+            self.modules.add(module)
+        else:
+            self.locale_modules.add((locale, module))
+        return self
+
+    def add_key(self, key: str) -> "InvalidationPlan":
+        """Mark a translation key as changed, updating its compiled bundle
+        entries and dropping its negative cache entry."""
+        self.keys.add(key)
+        return self
+
+    def add_topic(self, topic: str) -> "InvalidationPlan":
+        """Invalidate in-process state registered for a topic, e.g. "locales"."""
+        self.topics.add(topic)
+        return self
+
+    def add_translation(
+        self,
+        locales: Iterable[str],
+        modules: Iterable[str],
+        membership_changed: bool = False,
+        key: Optional[str] = None,
+    ) -> "InvalidationPlan":
+        """Invalidate what a change to one translation key affects.
+
+        Texts changed in a locale may be cached under any module, so the whole
+        locale is invalidated. When the key is created, deleted or moved
+        between modules, every locale's map of those modules changes as well
+        (maps list keys missing in a locale with the key as text). Passing
+        the key updates its bundle entries and clears its negative cache entry.
+        The coverage statistics of all given modules are dropped.
+        """
+        if key is not None:
+            self.add_key(key)
+        modules = list(modules)
+        self.touched_modules.update(modules)
+        for locale in locales:
+            self.add_locale(locale)
+        if membership_changed:
+            for module in modules:
+                self.add_module(module)
+        return self
+
+    def merge(self, other: "InvalidationPlan") -> "InvalidationPlan":
+        """Add everything another plan invalidates to this one."""
+        self.locales |= other.locales
+        self.modules |= other.modules
+        self.locale_modules |= other.locale_modules
+        self.keys |= other.keys
+        self.touched_modules |= other.touched_modules
+        self.topics |= other.topics
+        return self
+
+    def targets(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Return the deduplicated (locale, module) targets to invalidate."""
+        targets: List[Tuple[Optional[str], Optional[str]]] = []
+        targets.extend((locale, None) for locale in sorted(self.locales))
+        targets.extend((None, module) for module in sorted(self.modules))
+        targets.extend(
+            (locale, module) for locale, module in sorted(self.locale_modules)
+            if locale not in self.locales and module not in self.modules
+        )
+        return targets
+
+    async def flush(self) -> None:
+        """Apply the plan and reset it."""
+        if self.keys:
+            # Bundles must be current before caches are rebuilt from them
+            await crud_bundle.sync_keys(
+                sorted(self.keys),
+                modules=self.modules | {module for _, module in self.locale_modules},
+            )
+        await cache_service.invalidate(self.targets(), sorted(self.keys), sorted(self.topics))
+        await invalidate_coverage(
+            self.touched_modules | self.modules | {module for _, module in self.locale_modules}
+        )
+        self._reset()
+
+    async def flush_write(self) -> None:
+        """Apply the plan of a translation write made through the API.
+
+        With the change stream watcher enabled, the watcher applies the same
+        invalidations from the write's change event, so the plan is dropped
+        instead of syncing bundles and bumping generations twice. Caches then
+        reflect the write once the watcher has handled its event.
+        """
+        if settings.locale_CHANGE_STREAM_ENABLED:
+            self._reset()
+            return
+        await self.flush()
+
+    def _reset(self) -> None:
+        self.locales.clear()
+        self.modules.clear()
+        self.locale_modules.clear()
+        self.keys.clear()
+        self.touched_modules.clear()
+        self.topics.clear()
+
+
+async def invalidate_translation(
+    locales: Iterable[str],
+    modules: Iterable[str],
+    membership_changed: bool = False,
+    key: Optional[str] = None,
+) -> None:
+    """Invalidate the caches affected by a write to one translation key, see InvalidationPlan.flush_write."""
+    await InvalidationPlan().add_translation(locales, modules, membership_changed, key).flush_write()
@@ -0,0 +1,138 @@
+import logging
+import time
+from typing import FrozenSet, Optional, Tuple
+from stufio.core.config import settings
+from ..crud.crud_locale import crud_locale
+from ..schemas.locale import LocaleResponse
+from . import serialization
+from .cache_service import cache_service
+from .fallback import fallback_chain
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Invalidation topic of the active locale list
+LOCALES_TOPIC = "locales"
+
+# Seconds to wait after a failed load before querying the database again
+LOAD_RETRY_DELAY = 5
+
+
+class LocaleRegistry:
+    """In-memory registry of the active locales.
+
+    The list is loaded from MongoDB once, kept as a pre-serialized response
+    body with its ETag, and reloaded after locales change in any worker or
+    when it is older than the registry TTL. If a reload fails, the last
+    loaded locales are kept, and loading is not retried for a few seconds.
+    """
+
+    def __init__(self):
+        self._codes: FrozenSet[str] = frozenset()
+        self._ordered: Tuple[str, ...] = ()
+        self._body = "[]"
+        self._etag = ""
+        self._loaded_at: Optional[float] = None
+        self._ready = False
+        self._failed_at: Optional[float] = None
+        self._single_flight = SingleFlight()
+
+    def reset(self) -> None:
+        """Forget the loaded locales, so they are reloaded on next use."""
+        self._loaded_at = None
+
+    @property
+    def loaded(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < settings.locale_LOCALE_REGISTRY_TTL
+        )
+
+    async def ensure_loaded(self) -> None:
+        """
+        Load the active locales if they are not loaded or are outdated.
+
+        Raises only if the locales could never be loaded; otherwise a failed
+        reload keeps the last loaded locales. After a failed load, the
+        database is not queried again for LOAD_RETRY_DELAY seconds.
+        """
+        if self.loaded:
+            return
+        if self._failed_at is not None and time.monotonic() - self._failed_at < LOAD_RETRY_DELAY:
+            if self._ready:
+                return
+            raise RuntimeError("Active locales could not be loaded")
+        try:
+            await self._single_flight.do("locales", self._try_load)
+        except Exception:
+            if not self._ready:
+                raise
+
+    async def _try_load(self) -> None:
+        try:
+            await self._load()
+        except Exception:
+            self._failed_at = time.monotonic()
+            logger.warning(
+                "Could not load active locales, retrying in %d seconds", LOAD_RETRY_DELAY, exc_info=True
+            )
+            raise
+        self._failed_at = None
+
+    async def _load(self) -> None:
+        # Locale changes in other workers reach this one over pub/sub
+        cache_service.ensure_listener()
+
+        locales = await crud_locale.get_active(limit=1000)
+        self._ordered = tuple(locale.code for locale in locales)
+        self._codes = frozenset(self._ordered)
+        self._body = serialization.dumps(
+            [LocaleResponse.model_validate(locale).model_dump() for locale in locales]
+        )
+        self._etag = serialization.content_etag(self._body)
+        self._loaded_at = time.monotonic()
+        self._ready = True
+        logger.debug("Loaded %d active locales", len(self._codes))
+
+    def resolve(self, code: str) -> Optional[str]:
+        """
+        Return the active locale serving a locale code, as of the last load.
+
+        That is the code itself if it is active, else the first active locale
+        of its fallback chain, e.g. "de" for "de-AT". Returns None if there
+        is none.
+        """
+        if code in self._codes:
+            return code
+        for locale in fallback_chain(code)[1:]:
+            if locale in self._codes:
+                return locale
+        return None
+
+    @property
+    def supported(self) -> FrozenSet[str]:
+        """Active locale codes as a set, as of the last load.
+
+        The same object is returned until the next load, so it can be used
+        as a memoization key cheaply.
+        """
+        return self._codes
+
+    @property
+    def codes(self) -> Tuple[str, ...]:
+        """Active locale codes in display order, as of the last load."""
+        return self._ordered
+
+    async def get_body(self) -> Tuple[str, str]:
+        """Return the active locales as an encoded JSON list and its ETag."""
+        await self.ensure_loaded()
+        return self._body, self._etag
+
+    async def invalidate(self) -> None:
+        """Reload the locales in every worker after they changed."""
+        await cache_service.invalidate([], topics=[LOCALES_TOPIC])
+
+
+# Create a singleton instance
+locale_registry = LocaleRegistry()
+cache_service.on_invalidate(LOCALES_TOPIC, locale_registry.reset)
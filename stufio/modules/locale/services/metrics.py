@@ -0,0 +1,183 @@
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Metric:
+    """Base class for in-process metrics keyed by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[_label_key(labels)] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the enclosed block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        result = []
+        for key, counts in self._counts.items():
+            count = sum(counts)
+            result.append({
+                "labels": dict(key),
+                "count": count,
+                "sum": self._sums[key],
+                "avg": self._sums[key] / count if count else 0.0,
+                "buckets": dict(zip([*map(str, self.buckets), "+Inf"], counts)),
+            })
+        return result
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[key]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registry of the module's metrics with JSON and Prometheus text export."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, buckets))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serializable dictionary."""
+        return {
+            name: {"type": metric.kind, "description": metric.description, "values": metric.snapshot()}
+            for name, metric in self._metrics.items()
+        }
+
+    def render_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+cache_lookups = metrics.counter(
+    "i18n_cache_lookups_total",
+    "Translation cache lookups by kind (map, text, missing) and source (l1, redis, miss)",
+)
+cache_invalidations = metrics.counter(
+    "i18n_cache_invalidations_total",
+    "Cache namespaces invalidated by scope (locale, module, locale_module)",
+)
+cache_miss_seconds = metrics.histogram(
+    "i18n_cache_miss_seconds",
+    "Time to serve a cache miss, including the rebuild",
+)
+map_build_seconds = metrics.histogram(
+    "i18n_map_build_seconds",
+    "Time to build a translations map from MongoDB",
+)
+map_payload_bytes = metrics.gauge(
+    "i18n_map_payload_bytes",
+    "Encoded size of the latest cached translations map per locale and module",
+)
+request_seconds = metrics.histogram(
+    "i18n_request_seconds",
+    "Latency of translation API endpoints",
+)
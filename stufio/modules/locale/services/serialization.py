@@ -0,0 +1,113 @@
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode values JSON does not support, such as datetimes and ObjectIds."""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps(obj: Any) -> str:
+    """Encode an object as compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON from a str or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+async def stream_json_object(
+    items: AsyncIterable[Tuple[str, Any]], chunk_size: int = 1000
+) -> AsyncIterator[str]:
+    """Encode (key, value) pairs as one JSON object, yielded in chunks of pairs."""
+    yield "{"
+    chunk = []
+    separator = ""
+    async for key, value in items:
+        chunk.append(f"{dumps(key)}:{dumps(value)}")
+        if len(chunk) >= chunk_size:
+            yield separator + ",".join(chunk)
+            separator = ","
+            chunk = []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "}"
+
+
+async def stream_json_array(items: AsyncIterable[Any], chunk_size: int = 1000) -> AsyncIterator[str]:
+    """Encode items as one JSON array, yielded in chunks of items."""
+    yield "["
+    chunk = []
+    separator = ""
+    async for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield separator + ",".join(chunk)
+            separator = ","
+            chunk = []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]"
+
+
+async def stream_ndjson(items: AsyncIterable[Any], chunk_size: int = 1000) -> AsyncIterator[str]:
+    """Encode items as newline-delimited JSON, yielded in chunks of lines."""
+    chunk = []
+    async for item in items:
+        chunk.append(dumps(item) + "\n")
+        if len(chunk) >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def content_etag(body: str) -> str:
+    """Return a strong ETag derived from the content hash of a response body."""
+    return '"%s"' % hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def encode_cursor(key: str) -> str:
+    """Encode the last key of a page as an opaque continuation token."""
+    return base64.urlsafe_b64encode(dumps({"k": key}).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """Decode a continuation token into the last key of the previous page.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        data = loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key = data["k"]
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor") from None
+    if not isinstance(key, str):
+        raise ValueError("Invalid pagination cursor")
+    return key
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from stufio.core.config import settings
+from ..crud.crud_bundle import crud_bundle
+from ..crud.crud_locale import crud_locale
+from ..crud.crud_translation import crud_translation
+from .cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up_translation_cache(concurrency: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
+    """Prebuild the translations maps of all active locales and known modules.
+
+    Maps that are already cached are skipped unless force is set. At most
+    `concurrency` maps are built at a time to keep the load on Mongo bounded.
+
+    Returns:
+        Counts of built, skipped and failed bundles and the duration in seconds
+    """
+    started = time.monotonic()
+    locales = [locale.code for locale in await crud_locale.get_active(limit=1000)]
+    modules = await crud_translation.get_modules()
+    semaphore = asyncio.Semaphore(concurrency or settings.locale_CACHE_WARMUP_CONCURRENCY)
+    stats = {"built": 0, "skipped": 0, "failed": 0}
+
+    async def warm(locale: str, module: str) -> None:
+        async with semaphore:
+            if not force and await cache_service.has_translations_map(locale, module):
+                stats["skipped"] += 1
+                return
+            try:
+                await cache_service.refresh_translations_map(
+                    locale,
+                    module,
+                    lambda: crud_bundle.get_map(locale, module),
+                )
+                stats["built"] += 1
+            except Exception:
+                logger.exception("Failed to warm up translations map %s:%s", locale, module)
+                stats["failed"] += 1
+
+    await asyncio.gather(*(warm(locale, module) for locale in locales for module in modules))
+
+    result = {
+        "locales": len(locales),
+        "modules": len(modules),
+        "bundles": stats["built"],
+        "skipped": stats["skipped"],
+        "failed": stats["failed"],
+        "duration": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        "Translation cache warm-up built %d bundles (%d skipped, %d failed) in %.3fs",
+        result["bundles"], result["skipped"], result["failed"], result["duration"],
+    )
+    return result
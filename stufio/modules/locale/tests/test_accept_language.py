@@ -0,0 +1,28 @@
+from stufio.modules.locale.middleware.accept_language import (
+    lookup_locale,
+    negotiate_locale,
+    parse_accept_language,
+)
+
+SUPPORTED = frozenset({"en", "de", "fr", "pt-BR"})
+
+
+def test_parse_orders_by_quality_then_position():
+    assert parse_accept_language("de-DE,de;q=0.9,en;q=0.8") == ("de-de", "de", "en")
+    assert parse_accept_language("en;q=0.5, fr, de;q=0.5") == ("fr", "en", "de")
+
+def test_parse_drops_zero_and_malformed_qualities():
+    assert parse_accept_language("fr;q=0, en;q=abc, de;q=2, pl") == ("pl",)
+    assert parse_accept_language("") == ()
+
+def test_lookup_truncates_subtags():
+    assert lookup_locale("de-ch-1996", SUPPORTED) == "de"
+    assert lookup_locale("pt-br", SUPPORTED) == "pt-BR"
+    assert lookup_locale("pt", SUPPORTED) is None
+    assert lookup_locale("en-x-private", SUPPORTED) == "en"
+
+def test_negotiate_picks_the_best_supported_locale():
+    assert negotiate_locale("de-DE,de;q=0.9,en;q=0.8", SUPPORTED) == "de"
+    assert negotiate_locale("pl, fr;q=0.5, *;q=0.1", SUPPORTED) == "fr"
+    assert negotiate_locale("pt_BR", SUPPORTED) == "pt-BR"
+    assert negotiate_locale("ja, *", SUPPORTED) is None
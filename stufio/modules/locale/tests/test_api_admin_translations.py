@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from stufio.modules.locale.api import admin_translations
+
+
+CREATED_AT = datetime(2026, 10, 1)
+
+
+@pytest.fixture
+def upsert(monkeypatch):
+    """Call upsert_translation_locale against a stored key, returning the membership_changed flag it invalidated with."""
+    invalidations = []
+
+    async def invalidate_translation(locales, modules, membership_changed=False, key=None):
+        invalidations.append(membership_changed)
+
+    def call(stored, modules, created_at=CREATED_AT):
+        async def get_by_key(key):
+            return stored
+
+        async def upsert_translation(**kwargs):
+            return SimpleNamespace(created_at=created_at)
+
+        monkeypatch.setattr(admin_translations, "crud_translation", SimpleNamespace(
+            get_by_key=get_by_key, upsert_translation=upsert_translation,
+        ))
+        monkeypatch.setattr(admin_translations, "invalidate_translation", invalidate_translation)
+        asyncio.run(admin_translations.upsert_translation_locale(
+            key="hello", locale="de", text="Hallo", modules=modules,
+            description=None, module_overrides=None, current_user=None,
+        ))
+        return invalidations.pop()
+
+    return call
+
+def test_text_edit_does_not_invalidate_module_membership(upsert):
+    stored = SimpleNamespace(modules=["common", "shop"], created_at=CREATED_AT)
+    assert upsert(stored, ["common"]) is False
+
+def test_created_or_moved_keys_invalidate_module_membership(upsert):
+    stored = SimpleNamespace(modules=["common"], created_at=CREATED_AT)
+    assert upsert(None, ["common"]) is True
+    assert upsert(stored, ["common", "shop"]) is True
+    # Deleted and created again between the read and the upsert
+    assert upsert(stored, ["common"], created_at=datetime(2026, 10, 18)) is True
@@ -0,0 +1,361 @@
+import asyncio
+import json
+
+from stufio.modules.locale.services import cache_service as cache_service_module
+from stufio.modules.locale.services.cache_service import CacheService, LocalCache
+from stufio.modules.locale.services.fallback import build_fallback_chain
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis client, with pipelines executed in order."""
+
+    def __init__(self):
+        self._client = self
+        self.values = {}
+        self.published = []
+        self.commands = []
+
+    def _run(self, command, *args, **kwargs):
+        self.commands.append(command)
+        return getattr(self, f"_{command}")(*args, **kwargs)
+
+    def _get(self, name):
+        return self.values.get(name)
+
+    def _mget(self, names):
+        return [self.values.get(name) for name in names]
+
+    def _set(self, name, value, nx=False, ex=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    def _incr(self, name):
+        self.values[name] = int(self.values.get(name, 0)) + 1
+        return self.values[name]
+
+    def _delete(self, *names):
+        return sum(self.values.pop(name, None) is not None for name in names)
+
+    def _hget(self, name, field):
+        return self.values.get(name, {}).get(field)
+
+    def _hgetall(self, name):
+        return dict(self.values.get(name, {}))
+
+    def _hmget(self, name, fields):
+        return [self.values.get(name, {}).get(field) for field in fields]
+
+    def _hset(self, name, mapping):
+        self.values.setdefault(name, {}).update(mapping)
+        return len(mapping)
+
+    def _expire(self, name, seconds):
+        return name in self.values
+
+    def _publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def _eval(self, script, numkeys, name, token):
+        return self._delete(name) if self.values.get(name) == token else 0
+
+    def __getattr__(self, command):
+        async def run(*args, **kwargs):
+            return self._run(command, *args, **kwargs)
+        return run
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queued = []
+
+    def __getattr__(self, command):
+        def queue(*args, **kwargs):
+            self.queued.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        queued, self.queued = self.queued, []
+        return [self.redis._run(command, *args, **kwargs) for command, args, kwargs in queued]
+
+
+class FakeClock:
+    """Stand-in for the time module, advancing by a step on every monotonic reading."""
+
+    def __init__(self, now=1000.0, step=0.0):
+        self.now = now
+        self.step = step
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        self.now += self.step
+        return self.now
+
+
+def _service(monkeypatch, redis=None):
+    """A CacheService using a fake Redis and its own in-process tier."""
+    redis = redis or FakeRedis()
+
+    async def redis_client():
+        return redis
+
+    monkeypatch.setattr(cache_service_module, "RedisClient", redis_client)
+    monkeypatch.setattr(cache_service_module, "fallback_chain", lambda locale: (locale,))
+    monkeypatch.setattr(CacheService, "local_cache", property(lambda self: self._local))
+    monkeypatch.setattr(CacheService, "ensure_listener", lambda self: None)
+    service = CacheService()
+    service._local = LocalCache(max_size=100, ttl=60)
+    return service, redis
+
+
+def test_local_cache_hit_and_miss():
+    cache = LocalCache(max_size=10, ttl=60)
+    assert cache.get(("map", "en", "common")) is None
+    cache.set(("map", "en", "common"), {"hello": "Hello"})
+    assert cache.get(("map", "en", "common")) == {"hello": "Hello"}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_local_cache_entries_have_their_own_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(cache_service_module.time, "monotonic", lambda: clock[0])
+    cache = LocalCache(max_size=10, ttl=60)
+    cache.set(("map", "en", "common"), {})
+    cache.set(("missing", "*", "*", "hello"), True, ttl=30)
+
+    clock[0] += 45
+    assert cache.get(("map", "en", "common")) == {}
+    assert cache.get(("missing", "*", "*", "hello")) is None
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_size=2, ttl=60)
+    cache.set(("map", "en", "a"), {})
+    cache.set(("map", "en", "b"), {})
+    cache.get(("map", "en", "a"))
+    cache.set(("map", "en", "c"), {})
+    assert cache.get(("map", "en", "b")) is None
+    assert cache.get(("map", "en", "a")) == {}
+    assert cache.stats()["evictions"] == 1
+
+def test_local_cache_expires_entries():
+    cache = LocalCache(max_size=10, ttl=-1)
+    cache.set(("map", "en", "common"), {})
+    assert cache.get(("map", "en", "common")) is None
+
+def test_local_cache_invalidate_scopes():
+    cache = LocalCache(max_size=10, ttl=60)
+    cache.set(("map", "de", "common"), {})
+    cache.set(("map", "de", "admin"), {})
+    cache.set(("map", "fr", "common"), {})
+    cache.set(("text", "de", "default", "hello"), "Hallo")
+
+    assert cache.invalidate("de", key="hello") == 1
+    assert cache.invalidate("de", module="common") == 1
+    assert cache.get(("map", "de", "admin")) == {}
+    assert cache.invalidate("de") == 1
+    assert cache.get(("map", "fr", "common")) == {}
+
+def test_local_cache_invalidates_many_keys_at_once():
+    cache = LocalCache(max_size=10, ttl=60)
+    cache.set(("missing", "*", "*", "a"), True)
+    cache.set(("missing", "*", "*", "b"), True)
+    cache.set(("text", "de", "default", "c"), "C")
+    cache.set(("map", "de", "common"), {})
+
+    assert cache.invalidate_keys(["a", "c"]) == 2
+    assert cache.get(("missing", "*", "*", "b")) is True
+    assert cache.invalidate_keys() == 1
+    assert cache.get(("map", "de", "common")) == {}
+
+def test_invalidating_many_keys_batches_deletes_and_publishes_no_key_list(monkeypatch):
+    service, redis = _service(monkeypatch)
+    monkeypatch.setattr(cache_service_module, "MAX_PUBLISHED_KEYS", 3)
+    monkeypatch.setattr(cache_service_module, "DELETE_BATCH_SIZE", 2)
+    service._local.set(("missing", "*", "*", "k1"), True)
+    service._local.set(("missing", "*", "*", "other"), True)
+
+    asyncio.run(service.invalidate([("de", None)], ["k1", "k2", "k3"]))
+    assert redis.commands == ["incr", "delete", "delete", "publish"]
+    assert json.loads(redis.published[-1][1])["keys"] == ["k1", "k2", "k3"]
+    assert service._local.peek(("missing", "*", "*", "k1")) is None
+    assert service._local.peek(("missing", "*", "*", "other")) is True
+
+    asyncio.run(service.invalidate([], ["k1", "k2", "k3", "k4"]))
+    assert json.loads(redis.published[-1][1])["keys"] is None
+
+    # Receiving workers drop the entries of every key
+    service._apply_invalidation(json.dumps({"origin": "other", "targets": [], "keys": None}))
+    assert service._local.peek(("missing", "*", "*", "other")) is None
+
+def test_local_cache_invalidates_locales_falling_back(monkeypatch):
+    monkeypatch.setattr(
+        cache_service_module, "fallback_chain", lambda locale: build_fallback_chain(locale, "en")
+    )
+    cache = LocalCache(max_size=10, ttl=60)
+    cache.set(("map", "fr-CA", "common"), {})
+    cache.set(("map", "fr", "common"), {})
+    cache.set(("map", "de", "common"), {})
+    cache.set(("missing", "*", "*", "hello"), True)
+
+    assert cache.invalidate("fr") == 2
+    assert cache.get(("map", "de", "common")) == {}
+    assert cache.invalidate("en") == 1
+    assert cache.get(("missing", "*", "*", "hello")) is True
+
+def test_entries_built_under_an_invalidated_namespace_stay_out_of_l1(monkeypatch):
+    monkeypatch.setattr(cache_service_module, "fallback_chain", lambda locale: (locale,))
+    service = CacheService()
+    service._local = LocalCache(max_size=10, ttl=60)
+    monkeypatch.setattr(CacheService, "local_cache", property(lambda self: self._local))
+
+    service._local.set(("gen", "en", "common"), "1.0.0")
+    service._local_set_current(("map", "en", "common"), {}, "en", "common", "1.0.0")
+    assert service._local.peek(("map", "en", "common")) == {}
+
+    # An invalidation lands while the next map is being built
+    service._local.invalidate("en")
+    service._local_set_current(("map", "en", "common"), {"hello": "Hello"}, "en", "common", "1.0.0")
+    assert service._local.peek(("map", "en", "common")) is None
+    assert service._local.stats()["hits"] == 0
+
+def test_entries_read_under_an_invalidated_namespace_stay_out_of_l1(monkeypatch):
+    class RacingRedis(FakeRedis):
+        def _hgetall(self, name):
+            # An invalidation lands while the map is being read
+            service._invalidate_local([("en", None)])
+            return super()._hgetall(name)
+
+        def _mget(self, names):
+            if names[0] == "i18n_gen:de":
+                service._invalidate_local([("de", None)])
+            return super()._mget(names)
+
+    service, redis = _service(monkeypatch, RacingRedis())
+    redis.values["translations_map:en:common:0.0.0"] = {"body": "{}", "built_at": "1"}
+
+    assert asyncio.run(service._get_cached_map("en", "common")).body == "{}"
+    assert service._local.peek(("map", "en", "common")) is None
+
+    # Neither is a namespace read while its locale is invalidated
+    asyncio.run(service._get_cached_map("de", "common"))
+    assert service._local.peek(("gen", "de", "common")) is None
+
+def _map_builder(builds, translations_map):
+    async def build():
+        builds.append(translations_map)
+        await asyncio.sleep(0)
+        return translations_map
+    return build
+
+def test_fresh_map_is_served_without_refreshing(monkeypatch):
+    service, _ = _service(monkeypatch)
+    clock = FakeClock()
+    monkeypatch.setattr(cache_service_module, "time", clock)
+    builds = []
+
+    async def scenario():
+        await service.set_translations_map("en", "common", {"hello": "Hello"})
+        clock.now += cache_service_module.settings.locale_CACHE_MAP_SOFT_TTL - 1
+        return await service.get_or_build_translations_map("en", "common", _map_builder(builds, {}))
+
+    assert asyncio.run(scenario()).decode() == {"hello": "Hello"}
+    assert builds == []
+    assert service._refresh_tasks == {}
+
+def test_stale_map_is_served_while_refreshed_once_in_the_background(monkeypatch):
+    service, _ = _service(monkeypatch)
+    clock = FakeClock()
+    monkeypatch.setattr(cache_service_module, "time", clock)
+    builds = []
+    builder = _map_builder(builds, {"hello": "Hello again"})
+
+    async def scenario():
+        await service.set_translations_map("en", "common", {"hello": "Hello"})
+        clock.now += cache_service_module.settings.locale_CACHE_MAP_SOFT_TTL + 1
+        stale = [await service.get_or_build_translations_map("en", "common", builder) for _ in range(2)]
+        assert len(service._refresh_tasks) == 1
+        await asyncio.gather(*service._refresh_tasks.values())
+        await asyncio.sleep(0)
+        assert service._refresh_tasks == {}
+        return stale, await service.get_or_build_translations_map("en", "common", builder)
+
+    stale, fresh = asyncio.run(scenario())
+    assert [entry.decode() for entry in stale] == [{"hello": "Hello"}, {"hello": "Hello"}]
+    assert builds == [{"hello": "Hello again"}]
+    assert fresh.decode() == {"hello": "Hello again"}
+
+def test_background_refresh_is_skipped_while_another_worker_rebuilds(monkeypatch):
+    service, redis = _service(monkeypatch)
+    monkeypatch.setattr(cache_service_module.settings, "locale_CACHE_REBUILD_LOCK_ENABLED", True)
+    redis.values["i18n_lock:map:en:common"] = "other worker"
+    builds = []
+
+    result = asyncio.run(service._rebuild_map("en", "common", _map_builder(builds, {"hello": "Hello"}), wait=False))
+    assert result is None
+    assert builds == []
+
+def test_rebuild_waits_for_the_map_of_the_lock_holder(monkeypatch):
+    service, redis = _service(monkeypatch)
+    holder, _ = _service(monkeypatch, redis)
+    monkeypatch.setattr(cache_service_module.settings, "locale_CACHE_REBUILD_LOCK_ENABLED", True)
+    redis.values["i18n_lock:map:en:common"] = "holder"
+    builds = []
+
+    async def scenario():
+        async def hold():
+            await asyncio.sleep(0.06)
+            await holder.set_translations_map("en", "common", {"hello": "Hello"})
+        holding = asyncio.create_task(hold())
+        entry = await service.refresh_translations_map("en", "common", _map_builder(builds, {}))
+        await holding
+        return entry
+
+    assert asyncio.run(scenario()).decode() == {"hello": "Hello"}
+    assert builds == []
+
+def test_rebuild_builds_itself_when_the_lock_holder_times_out(monkeypatch):
+    service, redis = _service(monkeypatch)
+    monkeypatch.setattr(cache_service_module, "time", FakeClock(step=0.5))
+    monkeypatch.setattr(cache_service_module.settings, "locale_CACHE_REBUILD_LOCK_ENABLED", True)
+    monkeypatch.setattr(cache_service_module.settings, "locale_CACHE_REBUILD_LOCK_WAIT", 1.0)
+    redis.values["i18n_lock:map:en:common"] = "holder"
+    builds = []
+
+    entry = asyncio.run(service.refresh_translations_map("en", "common", _map_builder(builds, {"hello": "Hello"})))
+    assert entry.decode() == {"hello": "Hello"}
+    assert builds == [{"hello": "Hello"}]
+    # The lock of the other worker is left alone
+    assert redis.values["i18n_lock:map:en:common"] == "holder"
+
+def test_bulk_lookup_builds_only_unknown_keys_and_backfills_them(monkeypatch):
+    service, redis = _service(monkeypatch)
+    redis.values["translation_catalog:de:shop:0.0.0"] = {"cached": "Im Cache"}
+    redis.values["translation_missing:gone"] = "1"
+    built = []
+
+    async def builder(keys):
+        built.append(keys)
+        return {"new": "Neu"}
+
+    keys = ["cached", "gone", "new", "unknown"]
+    texts = asyncio.run(service.get_or_build_translations("de", keys, "shop", builder))
+
+    assert texts == {"cached": "Im Cache", "new": "Neu"}
+    assert built == [["new", "unknown"]]
+    assert redis.values["translation_catalog:de:shop:0.0.0"] == {"cached": "Im Cache", "new": "Neu"}
+    assert redis.values["translation_missing:unknown"] == "1"
+
+    # Everything is now answered from the in-process tier
+    redis.commands.clear()
+    assert asyncio.run(service.get_or_build_translations("de", keys, "shop", builder)) == texts
+    assert built == [["new", "unknown"]]
+    assert redis.commands == []
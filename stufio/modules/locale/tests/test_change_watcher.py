@@ -0,0 +1,162 @@
+import asyncio
+from types import SimpleNamespace
+
+from stufio.modules.locale.services import change_watcher as change_watcher_module
+from stufio.modules.locale.services.change_watcher import (
+    ChangeWatcher,
+    InvalidationPlan,
+    plan_locale_change,
+    plan_translation_change,
+)
+
+
+def _document(key="hello", modules=("common",), locales=("en",)):
+    return {"key": key, "modules": list(modules), "translations": {locale: {"text": key} for locale in locales}}
+
+def test_insert_invalidates_locales_and_modules():
+    plan = plan_translation_change({"operationType": "insert", "fullDocument": _document(locales=("en", "fr"))})
+    assert plan.targets() == [("en", None), ("fr", None), (None, "common")]
+    assert plan.keys == {"hello"}
+
+def test_update_of_a_locale_text_invalidates_only_that_locale():
+    plan = plan_translation_change({
+        "operationType": "update",
+        "fullDocument": _document(locales=("en", "fr")),
+        "updateDescription": {"updatedFields": {"translations.fr.text": "Bonjour", "updated_at": 0}, "removedFields": []},
+    })
+    assert plan.targets() == [("fr", None)]
+
+def test_update_of_modules_needs_the_pre_image():
+    event = {
+        "operationType": "update",
+        "fullDocument": _document(modules=("common", "admin")),
+        "updateDescription": {"updatedFields": {"modules": ["common", "admin"]}, "removedFields": []},
+    }
+    assert plan_translation_change(event) is None
+
+    event["fullDocumentBeforeChange"] = _document(modules=("common", "shop"))
+    plan = plan_translation_change(event)
+    assert plan.targets() == [(None, "admin"), (None, "common"), (None, "shop")]
+
+def test_delete_without_pre_image_cannot_be_narrowed_down():
+    assert plan_translation_change({"operationType": "delete", "documentKey": {"_id": 1}}) is None
+    assert plan_translation_change({"operationType": "drop"}) is None
+
+def test_delete_with_pre_image():
+    plan = plan_translation_change({
+        "operationType": "delete",
+        "fullDocumentBeforeChange": _document(locales=("de",)),
+    })
+    assert plan.targets() == [("de", None), (None, "common")]
+    assert plan.keys == {"hello"}
+
+def test_key_rename_drops_the_old_key():
+    event = {
+        "operationType": "update",
+        "fullDocument": _document(key="hi"),
+        "updateDescription": {"updatedFields": {"key": "hi"}, "removedFields": []},
+    }
+    assert plan_translation_change(event) is None
+
+    event["fullDocumentBeforeChange"] = _document(key="hello")
+    plan = plan_translation_change(event)
+    assert plan.keys == {"hello", "hi"}
+    assert plan.targets() == [(None, "common")]
+
+def test_replace_of_the_key_drops_the_old_key():
+    plan = plan_translation_change({
+        "operationType": "replace",
+        "fullDocument": _document(key="hi"),
+        "fullDocumentBeforeChange": _document(key="hello"),
+    })
+    assert plan.keys == {"hello", "hi"}
+
+def test_locale_change_invalidates_the_locale():
+    plan = plan_locale_change({"operationType": "update", "fullDocument": {"code": "pl", "active": False}})
+    assert plan.targets() == [("pl", None)]
+    assert plan.topics == {"locales"}
+    assert plan_locale_change({"operationType": "delete"}).targets() == []
+
+def test_delete_without_pre_image_is_narrowed_down_from_the_bundles(monkeypatch):
+    async def locate(document_id):
+        assert document_id == 1
+        return {"hello"}, {"common"}
+
+    async def known_locales():
+        return {"en", "fr"}
+
+    monkeypatch.setattr(change_watcher_module, "crud_bundle", SimpleNamespace(locate=locate))
+    monkeypatch.setattr(change_watcher_module, "settings", SimpleNamespace(locale_BUNDLES_ENABLED=True))
+    watcher = ChangeWatcher()
+    monkeypatch.setattr(watcher, "_known_locales", known_locales)
+
+    plan = asyncio.run(watcher._plan_from_bundles({"operationType": "delete", "documentKey": {"_id": 1}}))
+    assert plan.targets() == [("en", None), ("fr", None), (None, "common")]
+    assert plan.keys == {"hello"}
+    assert asyncio.run(watcher._plan_from_bundles({"operationType": "drop"})) is None
+
+class FakeStream:
+    def __init__(self, batches):
+        # Each batch holds the events returned before the stream has to wait
+        self.batches = [list(batch) for batch in batches]
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while self.batches and not self.batches[0]:
+            self.batches.pop(0)
+        if not self.batches:
+            raise StopAsyncIteration
+        return self._take()
+
+    async def try_next(self):
+        if not self.batches or not self.batches[0]:
+            return None
+        return self._take()
+
+    def _take(self):
+        event = self.batches[0].pop(0)
+        self.resume_token = {"_data": event["documentKey"]["_id"]}
+        return event
+
+
+def test_waiting_changes_are_applied_with_one_flush(monkeypatch):
+    flushed = []
+    tokens = []
+
+    async def flush(self):
+        flushed.append((self.targets(), set(self.keys)))
+
+    async def set_token(name, value):
+        tokens.append(value)
+
+    async def redis_client():
+        return SimpleNamespace(_client=SimpleNamespace(set=set_token))
+
+    monkeypatch.setattr(InvalidationPlan, "flush", flush)
+    monkeypatch.setattr(change_watcher_module, "RedisClient", redis_client)
+
+    def insert(document_id, key, locale):
+        return {
+            "operationType": "insert",
+            "ns": {"coll": "i18n_translations"},
+            "documentKey": {"_id": document_id},
+            "fullDocument": _document(key=key, locales=(locale,)),
+        }
+
+    stream = FakeStream([[insert(1, "a", "en"), insert(2, "b", "fr")], [insert(3, "c", "de")]])
+    asyncio.run(ChangeWatcher()._consume_stream(stream, {"i18n_translations": plan_translation_change}))
+
+    assert flushed == [
+        ([("en", None), ("fr", None), (None, "common")], {"a", "b"}),
+        ([("de", None), (None, "common")], {"c"}),
+    ]
+    assert len(tokens) == 2
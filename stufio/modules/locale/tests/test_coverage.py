@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+from stufio.modules.locale.services import coverage as coverage_module
+
+
+class FakeRedis:
+    def __init__(self):
+        self._client = self
+        self.values = {}
+
+    async def mget(self, names):
+        return [self.values.get(name) for name in names]
+
+    async def incr(self, name):
+        self.values[name] = int(self.values.get(name, 0)) + 1
+        return self.values[name]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, name, value, ex=None):
+        self.commands.append(lambda: self.redis.values.__setitem__(name, value))
+
+    def incr(self, name):
+        self.commands.append(lambda: self.redis.values.__setitem__(name, int(self.redis.values.get(name, 0)) + 1))
+
+    async def execute(self):
+        for command in self.commands:
+            command()
+
+
+def _patch(monkeypatch, get_coverage):
+    redis = FakeRedis()
+
+    async def redis_client():
+        return redis
+
+    async def get_active(limit):
+        return [SimpleNamespace(code="en")]
+
+    monkeypatch.setattr(coverage_module, "RedisClient", redis_client)
+    monkeypatch.setattr(coverage_module, "crud_locale", SimpleNamespace(get_active=get_active))
+    monkeypatch.setattr(coverage_module, "crud_translation", SimpleNamespace(get_coverage=get_coverage))
+    return redis
+
+
+def test_coverage_is_cached_per_module_until_invalidated(monkeypatch):
+    computed = []
+
+    async def get_coverage(modules, locales):
+        computed.append(list(modules))
+        return {module: [{"module": module, "locale": "en"}] for module in modules}
+
+    _patch(monkeypatch, get_coverage)
+
+    asyncio.run(coverage_module.get_coverage(["shop", "admin"]))
+    asyncio.run(coverage_module.get_coverage(["shop", "admin"]))
+    assert computed == [["shop", "admin"]]
+
+    asyncio.run(coverage_module.invalidate_coverage(["shop"]))
+    asyncio.run(coverage_module.get_coverage(["shop", "admin"]))
+    assert computed == [["shop", "admin"], ["shop"]]
+
+    asyncio.run(coverage_module.invalidate_coverage())
+    asyncio.run(coverage_module.get_coverage(["shop", "admin"]))
+    assert computed[-1] == ["shop", "admin"]
+
+def test_coverage_made_stale_while_counting_is_not_served(monkeypatch):
+    computed = []
+
+    async def get_coverage(modules, locales):
+        computed.append(list(modules))
+        if len(computed) == 1:
+            # A translation of the module is written during the aggregation
+            await coverage_module.invalidate_coverage(["shop"])
+        return {module: [{"module": module, "locale": "en", "translated": len(computed)}] for module in modules}
+
+    _patch(monkeypatch, get_coverage)
+
+    asyncio.run(coverage_module.get_coverage(["shop"]))
+    coverage = asyncio.run(coverage_module.get_coverage(["shop"]))
+    assert computed == [["shop"], ["shop"]]
+    assert coverage["shop"][0]["translated"] == 2
@@ -0,0 +1,193 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+from stufio.modules.locale.crud.crud_bundle import PLACEHOLDER_BUILT_AT, CRUDBundle, _patch_update
+
+# The crud package re-exports the CRUD singletons under the module names
+crud_bundle_module = importlib.import_module("stufio.modules.locale.crud.crud_bundle")
+crud_translation_module = importlib.import_module("stufio.modules.locale.crud.crud_translation")
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+
+def _matches(document, query):
+    for field, condition in query.items():
+        value = document.get(field, 0 if field == "version" else None)
+        if isinstance(condition, dict):
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeBundles:
+    """Just enough of a Motor collection to run CRUDBundle against."""
+
+    def __init__(self, *documents):
+        self.documents = {document["_id"]: document for document in documents}
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(document) for document in self.documents.values() if _matches(document, query)])
+
+    async def bulk_write(self, operations, ordered=True):
+        matched = sum(self._update(op._filter, op._doc, op._upsert) for op in operations)
+        return SimpleNamespace(matched_count=matched)
+
+    async def update_one(self, query, update, upsert=False):
+        return SimpleNamespace(matched_count=self._update(query, update, upsert))
+
+    async def delete_one(self, query):
+        document = self.documents.get(query["_id"])
+        if document is None or not _matches(document, query):
+            return SimpleNamespace(deleted_count=0)
+        del self.documents[query["_id"]]
+        return SimpleNamespace(deleted_count=1)
+
+    async def delete_many(self, query):
+        for document in list(self.documents.values()):
+            if _matches(document, query):
+                del self.documents[document["_id"]]
+
+    def _update(self, query, update, upsert):
+        document = self.documents.get(query["_id"])
+        if document is None:
+            if upsert:
+                self.documents[query["_id"]] = {"_id": query["_id"], **update["$setOnInsert"]}
+            return 0
+        if not _matches(document, query):
+            return 0
+        if isinstance(update, list):
+            # The pipeline built by _patch_update
+            stage = update[0]["$set"]
+            removed, appended = stage["entries"]["$concatArrays"]
+            keys = removed["$filter"]["cond"]["$not"][0]["$in"][1]["$literal"]
+            document["entries"] = [
+                entry for entry in document["entries"] if entry["k"] not in keys
+            ] + appended["$literal"]
+            document["version"] = document.get("version", 0) + 1
+        else:
+            document.update(update.get("$set", {}))
+            document["version"] = document.get("version", 0) + update.get("$inc", {}).get("version", 0)
+        return 1
+
+
+class FakeTranslations:
+    def __init__(self, *documents):
+        self.documents = [{"_id": index, **document} for index, document in enumerate(documents)]
+        self.on_find = None
+
+    def find(self, query, projection=None):
+        if self.on_find is not None:
+            self.on_find()
+        return FakeCursor([document for document in self.documents if document["key"] in query["key"]["$in"]])
+
+
+def _crud(monkeypatch, bundles, translations=None, get_translations_maps_with_ids=None):
+    monkeypatch.setattr(crud_bundle_module, "settings", SimpleNamespace(
+        locale_BUNDLES_ENABLED=True,
+        locale_BUNDLE_MAX_AGE=86400,
+        locale_CHANGE_STREAM_ENABLED=False,
+        locale_CACHE_MAP_SOFT_TTL=300,
+    ))
+    monkeypatch.setattr(crud_translation_module, "fallback_chain", lambda locale: (locale,))
+    monkeypatch.setattr(crud_bundle_module, "crud_translation", SimpleNamespace(
+        engine=SimpleNamespace(get_collection=lambda model: translations),
+        get_translations_maps_with_ids=get_translations_maps_with_ids,
+    ))
+
+    class CRUD(CRUDBundle):
+        engine = SimpleNamespace(get_collection=lambda model: bundles)
+
+    return CRUD.__new__(CRUD)
+
+
+def _bundle(locale, version, **entries):
+    return {
+        "_id": f"{locale}:app",
+        "locale": locale,
+        "module": "app",
+        "entries": [{"k": key, "v": text} for key, text in entries.items()],
+        "version": version,
+    }
+
+
+def test_patch_update_passes_keys_and_texts_as_literals():
+    update = _patch_update(["$hello"], [{"k": "$hello", "v": "$Hi"}], now=None)
+    stage = update[0]["$set"]
+    assert stage["version"] == {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+    removed, appended = stage["entries"]["$concatArrays"]
+    assert removed["$filter"]["cond"] == {"$not": [{"$in": ["$$this.k", {"$literal": ["$hello"]}]}]}
+    assert appended == {"$literal": [{"k": "$hello", "v": "$Hi"}]}
+
+def test_sync_keys_patches_again_when_a_bundle_changed_concurrently(monkeypatch):
+    bundles = FakeBundles(_bundle("en", 1, hello="Hi", bye="Bye"), _bundle("de", 1, hello="Hallo"))
+    translations = FakeTranslations({
+        "key": "hello",
+        "modules": ["app"],
+        "translations": {"en": {"text": "Hello"}, "de": {"text": "Hallo!"}},
+    })
+    finds = []
+
+    def concurrent_write():
+        finds.append(1)
+        # Another writer patches the English bundle after its version was read
+        if len(finds) == 2:
+            bundles.documents["en:app"]["version"] += 1
+
+    translations.on_find = concurrent_write
+    asyncio.run(_crud(monkeypatch, bundles, translations).sync_keys(["hello"]))
+
+    assert bundles.documents["en:app"]["entries"] == [{"k": "bye", "v": "Bye"}, {"k": "hello", "v": "Hello", "i": 0}]
+    assert bundles.documents["de:app"]["entries"] == [{"k": "hello", "v": "Hallo!", "i": 0}]
+    assert len(finds) == 3
+
+def test_sync_keys_drops_bundles_that_keep_changing(monkeypatch):
+    bundles = FakeBundles(_bundle("en", 1, hello="Hi"))
+    translations = FakeTranslations({"key": "hello", "modules": ["app"], "translations": {"en": {"text": "Hello"}}})
+
+    def concurrent_write():
+        bundles.documents["en:app"]["version"] += 1
+
+    translations.on_find = concurrent_write
+    asyncio.run(_crud(monkeypatch, bundles, translations).sync_keys(["hello"]))
+
+    assert bundles.documents == {}
+
+def test_compiled_bundle_is_stored_under_its_reserved_version(monkeypatch):
+    bundles = FakeBundles()
+
+    async def compile_maps(locales, modules):
+        return {("en", "app"): {"hello": "Hello"}}, {"hello": 7}
+
+    maps = asyncio.run(_crud(monkeypatch, bundles, get_translations_maps_with_ids=compile_maps).get_maps([("en", "app")]))
+
+    assert maps == {("en", "app"): {"hello": "Hello"}}
+    assert bundles.documents["en:app"]["entries"] == [{"k": "hello", "v": "Hello", "i": 7}]
+    assert bundles.documents["en:app"]["version"] == 1
+
+def test_compiled_bundle_is_not_stored_over_a_concurrent_write(monkeypatch):
+    bundles = FakeBundles()
+
+    async def compile_maps(locales, modules):
+        # A write lands while the map is compiled and patches the placeholder
+        bundles._update({"_id": "en:app"}, _patch_update(["hello"], [{"k": "hello", "v": "Hello!"}], None), False)
+        return {("en", "app"): {"hello": "Hello"}}, {"hello": 7}
+
+    maps = asyncio.run(_crud(monkeypatch, bundles, get_translations_maps_with_ids=compile_maps).get_maps([("en", "app")]))
+
+    assert maps == {("en", "app"): {"hello": "Hello"}}
+    # The placeholder is kept, so the bundle is compiled again on the next read
+    assert bundles.documents["en:app"]["built_at"] == PLACEHOLDER_BUILT_AT
+    assert bundles.documents["en:app"]["version"] == 1
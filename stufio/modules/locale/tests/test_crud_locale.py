@@ -0,0 +1,63 @@
+import asyncio
+
+from bson import ObjectId
+
+from stufio.modules.locale.crud.crud_locale import CRUDLocale
+from stufio.modules.locale.models.locale import Locale
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+        self.calls = []
+
+    def sort(self, keys):
+        self.calls.append(("sort", keys))
+        return self
+
+    def skip(self, skip):
+        self.calls.append(("skip", skip))
+        return self
+
+    def limit(self, limit):
+        self.calls.append(("limit", limit))
+        return self
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class FakeEngine:
+    def __init__(self, documents):
+        self.cursor = FakeCursor(documents)
+        self.queries = []
+
+    def get_collection(self, model):
+        assert model is Locale
+        return self
+
+    def find(self, query):
+        self.queries.append(query)
+        return self.cursor
+
+
+def test_get_active_reads_raw_documents():
+    documents = [
+        {"_id": ObjectId(), "code": "en", "name": "English", "localized_name": "English", "active": True},
+        {"_id": ObjectId(), "code": "de", "name": "German", "localized_name": "Deutsch", "active": True},
+    ]
+    engine = FakeEngine(documents)
+
+    class CRUD(CRUDLocale):
+        pass
+
+    CRUD.engine = engine
+    crud = CRUD.__new__(CRUD)
+
+    locales = asyncio.run(crud.get_active(skip=1, limit=10))
+
+    assert engine.queries == [{"active": True}]
+    assert engine.cursor.calls == [("sort", [("sort_order", 1), ("name", 1)]), ("skip", 1), ("limit", 10)]
+    assert [locale.code for locale in locales] == ["en", "de"]
+    assert all(isinstance(locale, Locale) for locale in locales)
+    assert locales[0].id == documents[0]["_id"]
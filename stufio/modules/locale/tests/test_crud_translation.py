@@ -0,0 +1,217 @@
+import asyncio
+import importlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from stufio.modules.locale.crud.crud_translation import (
+    CRUDTranslation,
+    TranslationImportError,
+    _check_field_name,
+    _locale_projection,
+    _resolve_text,
+    _upsert_update,
+)
+from stufio.modules.locale.schemas.translation import LocaleTranslationCreate, TranslationImportItem
+from stufio.modules.locale.services.fallback import build_fallback_chain
+
+# The crud package re-exports the CRUD singleton under the module name
+crud_translation_module = importlib.import_module("stufio.modules.locale.crud.crud_translation")
+
+
+class FakeAggregation:
+    def __init__(self, result):
+        self.result = result
+
+    async def to_list(self, length):
+        return [self.result]
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+
+class FakeCollection:
+    def __init__(self, aggregation=None, bulk_results=(), documents=()):
+        self.aggregation = aggregation
+        self.bulk_results = list(bulk_results)
+        self.documents = list(documents)
+        self.pipelines = []
+        self.batches = []
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append((query, projection))
+        return FakeCursor(self.documents)
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeAggregation(self.aggregation)
+
+    async def bulk_write(self, operations, ordered=True):
+        assert not ordered
+        self.batches.append([operation._filter["key"] for operation in operations])
+        result = self.bulk_results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _crud(collection):
+    class CRUD(CRUDTranslation):
+        pass
+
+    CRUD.engine = SimpleNamespace(get_collection=lambda model: collection)
+    return CRUD.__new__(CRUD)
+
+
+@pytest.fixture
+def fallback(monkeypatch):
+    monkeypatch.setattr(
+        crud_translation_module, "fallback_chain", lambda locale: build_fallback_chain(locale, "en")
+    )
+
+
+def test_check_field_name_rejects_dots_and_dollars():
+    assert _check_field_name("pt-BR") == "pt-BR"
+    for name in ("", "en.US", "$where"):
+        with pytest.raises(ValueError):
+            _check_field_name(name)
+
+def test_locale_projection_reads_texts_and_overrides_of_the_fallback_chain(fallback):
+    assert _locale_projection(["fr-CA"], ["shop", None]) == {
+        "_id": 0,
+        "key": 1,
+        "translations.fr-CA.text": 1,
+        "translations.fr-CA.module_overrides.shop": 1,
+        "translations.fr.text": 1,
+        "translations.fr.module_overrides.shop": 1,
+        "translations.en.text": 1,
+        "translations.en.module_overrides.shop": 1,
+    }
+
+def test_locale_projection_rejects_invalid_names(fallback):
+    with pytest.raises(ValueError):
+        _locale_projection(["en"], ["shop.cart"])
+    with pytest.raises(ValueError):
+        _locale_projection(["$en"])
+
+def test_resolve_text_prefers_the_module_override(fallback):
+    document = {
+        "key": "checkout",
+        "translations": {"de": {"text": "Kasse", "module_overrides": {"shop": "Zur Kasse"}}},
+    }
+    assert _resolve_text(document, "de", "shop") == "Zur Kasse"
+    assert _resolve_text(document, "de", "admin") == "Kasse"
+    assert _resolve_text(document, "de") == "Kasse"
+
+def test_resolve_text_falls_back_along_the_chain_then_to_the_key(fallback):
+    document = {"key": "checkout", "translations": {"fr": {"text": "Caisse"}}}
+    assert _resolve_text(document, "fr-CA") == "Caisse"
+    assert _resolve_text(document, "de") == "checkout"
+    assert _resolve_text({"key": "checkout"}, "fr") == "checkout"
+
+def test_upsert_update_sets_nested_paths_and_adds_modules():
+    now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    update = _upsert_update(
+        now,
+        modules=["shop", "shop", "admin"],
+        translations={"de": LocaleTranslationCreate(text="Kasse", module_overrides={"shop": "Zur Kasse"})},
+        description="Checkout button",
+    )
+    assert update == {
+        "$set": {
+            "updated_at": now,
+            "description": "Checkout button",
+            "translations.de.text": "Kasse",
+            "translations.de.updated_at": now,
+            "translations.de.module_overrides.shop": "Zur Kasse",
+        },
+        "$setOnInsert": {"created_at": now},
+        "$addToSet": {"modules": {"$each": ["shop", "admin"]}},
+    }
+
+def test_upsert_update_without_modules_or_translations():
+    now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+    assert _upsert_update(now) == {"$set": {"updated_at": now}, "$setOnInsert": {"created_at": now}}
+    with pytest.raises(ValueError):
+        _upsert_update(now, translations={"de.AT": LocaleTranslationCreate(text="Kasse")})
+
+def test_get_coverage_counts_keys_of_each_locale_and_module():
+    collection = FakeCollection({
+        "keys": [{"_id": "shop", "count": 3}],
+        "translated": [
+            {"_id": {"module": "shop", "locale": "de"}, "count": 2, "overridden": 1},
+            {"_id": {"module": "shop", "locale": "pl"}, "count": 1, "overridden": 0},
+        ],
+    })
+
+    coverage = asyncio.run(_crud(collection).get_coverage(["shop", "admin"], locales=["en", "de"]))
+
+    assert collection.pipelines[0][0] == {"$match": {"modules": {"$in": ["shop", "admin"]}}}
+    assert coverage == {
+        "shop": [
+            {"module": "shop", "locale": "de", "keys": 3, "translated": 2, "missing": 1, "overridden": 1},
+            {"module": "shop", "locale": "en", "keys": 3, "translated": 0, "missing": 3, "overridden": 0},
+            {"module": "shop", "locale": "pl", "keys": 3, "translated": 1, "missing": 2, "overridden": 0},
+        ],
+        "admin": [
+            {"module": "admin", "locale": "de", "keys": 0, "translated": 0, "missing": 0, "overridden": 0},
+            {"module": "admin", "locale": "en", "keys": 0, "translated": 0, "missing": 0, "overridden": 0},
+        ],
+    }
+
+def _bulk_result(matched=0, modified=0, upserted=0):
+    return SimpleNamespace(matched_count=matched, modified_count=modified, upserted_count=upserted)
+
+def _import_items(*keys):
+    return [TranslationImportItem(key=key, modules=["shop"]) for key in keys]
+
+def test_bulk_upsert_sums_the_counts_of_its_batches():
+    collection = FakeCollection(bulk_results=[_bulk_result(2, 1, 0), _bulk_result(0, 0, 1)])
+
+    counts = asyncio.run(_crud(collection).bulk_upsert(_import_items("a", "b", "c"), batch_size=2))
+
+    assert collection.batches == [["a", "b"], ["c"]]
+    assert counts == {"matched": 2, "modified": 1, "upserted": 1}
+
+def test_bulk_upsert_reports_partial_counts_and_the_failed_keys():
+    failure = BulkWriteError({
+        "nMatched": 0,
+        "nModified": 0,
+        "nUpserted": 1,
+        "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+    })
+    collection = FakeCollection(bulk_results=[_bulk_result(2, 2, 0), failure, _bulk_result(1, 1, 0)])
+
+    with pytest.raises(TranslationImportError) as raised:
+        asyncio.run(_crud(collection).bulk_upsert(_import_items("a", "b", "c", "d", "e"), batch_size=2))
+
+    # The batch after the failed one is not sent
+    assert collection.batches == [["a", "b"], ["c", "d"]]
+    assert raised.value.counts == {"matched": 2, "modified": 2, "upserted": 1}
+    assert raised.value.errors == [{"key": "d", "code": 11000, "message": "duplicate key"}]
+
+def test_get_translations_texts_reads_all_keys_with_one_query(fallback):
+    collection = FakeCollection(documents=[
+        {"key": "checkout", "translations": {"fr": {"text": "Caisse"}}},
+        {"key": "cart", "translations": {"en": {"text": "Cart"}}},
+    ])
+
+    texts = asyncio.run(_crud(collection).get_translations_texts(["checkout", "cart", "gone"], "fr-CA", "shop"))
+
+    assert texts == {"checkout": "Caisse", "cart": "Cart"}
+    assert collection.queries == [
+        ({"key": {"$in": ["checkout", "cart", "gone"]}}, _locale_projection(["fr-CA"], ["shop"])),
+    ]
+    assert asyncio.run(_crud(collection).get_translations_texts([], "fr")) == {}
@@ -0,0 +1,15 @@
+from stufio.modules.locale.services.fallback import build_fallback_chain
+
+
+def test_fallback_chain_drops_subtags_then_uses_fallback_locale():
+    assert build_fallback_chain("fr-CA", "en") == ("fr-CA", "fr", "en")
+    assert build_fallback_chain("zh-Hant-TW", "en") == ("zh-Hant-TW", "zh-Hant", "zh", "en")
+    assert build_fallback_chain("pt_BR", "en") == ("pt_BR", "pt", "en")
+
+def test_fallback_chain_skips_single_letter_subtags():
+    assert build_fallback_chain("de-x-formal", "en") == ("de-x-formal", "de", "en")
+
+def test_fallback_chain_without_duplicates():
+    assert build_fallback_chain("en", "en") == ("en",)
+    assert build_fallback_chain("en-GB", "en") == ("en-GB", "en")
+    assert build_fallback_chain("fr", None) == ("fr",)
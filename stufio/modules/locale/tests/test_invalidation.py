@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+
+from stufio.modules.locale.services import invalidation as invalidation_module
+from stufio.modules.locale.services.invalidation import InvalidationPlan
+
+
+def test_plan_drops_namespaces_covered_by_locale_or_module():
+    plan = InvalidationPlan()
+    plan.add_module("common", locale="en")
+    plan.add_module("admin", locale="fr")
+    plan.add_module("shop", locale="fr")
+    plan.add_locale("en")
+    plan.add_module("shop")
+    assert plan.targets() == [("en", None), (None, "shop"), ("fr", "admin")]
+
+def test_plan_for_translation_change():
+    plan = InvalidationPlan().add_translation(["en", "fr", "en"], ["common"])
+    assert plan.targets() == [("en", None), ("fr", None)]
+    assert plan.touched_modules == {"common"}
+
+    plan = InvalidationPlan().add_translation(["en"], ["common", "admin"], membership_changed=True)
+    assert plan.targets() == [("en", None), (None, "admin"), (None, "common")]
+
+def test_merged_plans_invalidate_both():
+    plan = InvalidationPlan().add_translation(["en"], ["common"], key="hello")
+    plan.merge(InvalidationPlan().add_translation(["fr"], ["admin"], membership_changed=True, key="bye"))
+    assert plan.targets() == [("en", None), ("fr", None), (None, "admin")]
+    assert plan.keys == {"hello", "bye"}
+    assert plan.touched_modules == {"common", "admin"}
+
+def test_writes_are_left_to_the_change_watcher_when_enabled(monkeypatch):
+    flushed = []
+
+    async def flush(self):
+        flushed.append(set(self.keys))
+
+    monkeypatch.setattr(InvalidationPlan, "flush", flush)
+    monkeypatch.setattr(invalidation_module, "settings", SimpleNamespace(locale_CHANGE_STREAM_ENABLED=False))
+    asyncio.run(InvalidationPlan().add_translation(["en"], ["common"], key="hello").flush_write())
+    assert flushed == [{"hello"}]
+
+    monkeypatch.setattr(invalidation_module, "settings", SimpleNamespace(locale_CHANGE_STREAM_ENABLED=True))
+    plan = InvalidationPlan().add_translation(["en"], ["common"], key="bye")
+    asyncio.run(plan.flush_write())
+    assert flushed == [{"hello"}]
+    assert plan.targets() == [] and plan.keys == set()
@@ -0,0 +1,52 @@
+import asyncio
+
+from stufio.modules.locale.middleware import LocaleMiddleware
+from stufio.modules.locale.services.locale_registry import LocaleRegistry, locale_registry
+
+
+def _call(scope):
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["scope"] = scope
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(LocaleMiddleware(app)(scope, receive, send))
+    return seen["scope"], sent
+
+
+def _supported(monkeypatch, *codes):
+    monkeypatch.setattr(LocaleRegistry, "loaded", True)
+    monkeypatch.setattr(locale_registry, "_codes", frozenset(codes))
+
+
+def test_middleware_negotiates_accept_language(monkeypatch):
+    _supported(monkeypatch, "en", "de")
+    scope, sent = _call({
+        "type": "http",
+        "query_string": b"",
+        "headers": [(b"accept-language", b"de-DE,de;q=0.9,en;q=0.8")],
+    })
+    assert scope["state"]["locale"] == "de"
+    assert sent == [{"type": "http.response.start", "status": 200, "headers": []}]
+
+def test_middleware_prefers_supported_query_locale(monkeypatch):
+    _supported(monkeypatch, "en", "de", "fr")
+    headers = [(b"accept-language", b"de")]
+    scope, _ = _call({"type": "http", "query_string": b"locale=fr", "headers": headers})
+    assert scope["state"]["locale"] == "fr"
+    scope, _ = _call({"type": "http", "query_string": b"locale=ja", "headers": headers})
+    assert scope["state"]["locale"] == "de"
+
+def test_middleware_passes_other_scopes_through(monkeypatch):
+    _supported(monkeypatch, "en")
+    scope, _ = _call({"type": "lifespan"})
+    assert "state" not in scope
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from stufio.modules.locale.services import locale_registry as locale_registry_module
+from stufio.modules.locale.services.fallback import build_fallback_chain
+from stufio.modules.locale.services.locale_registry import LocaleRegistry
+
+
+def _registry(*codes):
+    registry = LocaleRegistry()
+    registry._codes = frozenset(codes)
+    registry._ordered = tuple(codes)
+    return registry
+
+
+def test_resolve_serves_regional_variants_from_active_locales(monkeypatch):
+    monkeypatch.setattr(
+        locale_registry_module, "fallback_chain", lambda locale: build_fallback_chain(locale, "en")
+    )
+    registry = _registry("en", "de", "pt-BR")
+
+    assert registry.resolve("de") == "de"
+    assert registry.resolve("de-AT") == "de"
+    assert registry.resolve("pt-BR") == "pt-BR"
+    assert registry.resolve("ja") == "en"
+
+def test_resolve_without_fallback(monkeypatch):
+    monkeypatch.setattr(locale_registry_module, "fallback_chain", lambda locale: (locale,))
+    registry = _registry("en", "de")
+
+    assert registry.resolve("de") == "de"
+    assert registry.resolve("de-AT") is None
+
+def test_failed_reload_keeps_the_last_loaded_locales(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(locale_registry_module.time, "monotonic", lambda: clock[0])
+    registry = _registry("en", "de")
+    attempts = []
+
+    async def fail():
+        attempts.append(clock[0])
+        raise ConnectionError("database unavailable")
+
+    monkeypatch.setattr(registry, "_load", fail)
+
+    # Never loaded: nothing to fall back to
+    with pytest.raises(ConnectionError):
+        asyncio.run(registry.ensure_loaded())
+
+    registry._ready = True
+    clock[0] += locale_registry_module.LOAD_RETRY_DELAY
+    asyncio.run(registry.ensure_loaded())
+    assert registry.codes == ("en", "de")
+
+    # The database is not queried again until the retry delay has passed
+    clock[0] += 1
+    asyncio.run(registry.ensure_loaded())
+    assert attempts == [100.0, 100.0 + locale_registry_module.LOAD_RETRY_DELAY]
@@ -0,0 +1,30 @@
+from stufio.modules.locale.services.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_export():
+    registry = MetricsRegistry()
+    lookups = registry.counter("lookups_total", "Lookups")
+    lookups.inc(kind="map", source="l1")
+    lookups.inc(2, kind="map", source="l1")
+    size = registry.gauge("payload_bytes", "Payload size")
+    size.set(10, locale="en", module='sh"op')
+
+    snapshot = registry.snapshot()
+    assert snapshot["lookups_total"]["values"] == [{"labels": {"kind": "map", "source": "l1"}, "value": 3.0}]
+    text = registry.render_prometheus()
+    assert 'lookups_total{kind="map",source="l1"} 3.0' in text
+    assert 'payload_bytes{locale="en",module="sh\\"op"} 10' in text
+
+def test_histogram_buckets_are_cumulative_in_export():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    values = registry.snapshot()["latency_seconds"]["values"][0]
+    assert values["count"] == 3
+    assert values["buckets"] == {"0.1": 1, "1.0": 1, "+Inf": 1}
+    text = registry.render_prometheus()
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert "latency_seconds_count 3" in text
@@ -0,0 +1,40 @@
+import pytest
+
+from stufio.modules.locale.services.serialization import (
+    content_etag,
+    decode_cursor,
+    dumps,
+    encode_cursor,
+    etag_matches,
+    loads,
+)
+
+
+def test_dumps_round_trip():
+    data = {"greeting": "Cześć", "farewell": "Tschüss"}
+    assert loads(dumps(data)) == data
+
+def test_content_etag_is_stable_and_quoted():
+    etag = content_etag('{"a":"b"}')
+    assert etag == content_etag('{"a":"b"}')
+    assert etag != content_etag('{"a":"c"}')
+    assert etag.startswith('"') and etag.endswith('"')
+
+def test_etag_matches():
+    etag = content_etag("{}")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+def test_cursor_round_trip():
+    for key in ("auth.login.title", "Cześć", ""):
+        cursor = encode_cursor(key)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == key
+
+def test_decode_cursor_rejects_malformed_tokens():
+    for cursor in ("not-base64!", encode_cursor("a")[:-2], "e30", "WzFd"):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
@@ -0,0 +1,37 @@
+import asyncio
+
+from stufio.modules.locale.services.single_flight import SingleFlight
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"hello": "Hello"}
+
+    async def run():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do(("map", "en", "common"), build) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"hello": "Hello"} for result in results)
+
+def test_single_flight_propagates_errors_and_forgets_key():
+    async def fail():
+        raise ValueError("boom")
+
+    async def run():
+        flight = SingleFlight()
+        for _ in range(2):
+            try:
+                await flight.do("key", fail)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("expected ValueError")
+        return await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+
+    assert asyncio.run(run()) == "ok"